@@ -13,10 +13,68 @@ class Settings(BaseSettings):
     openai_chat_model: str = "gpt-4o"
     openai_router_model: str = "gpt-4o-mini"
 
+    embedding_backend: str = "openai"
     embedding_dimensions: int = 1536
+    embedding_dtype: str = "float32"
+    embedding_max_concurrency: int = 4
+    embedding_max_retries: int = 5
+    embedding_batch_max_tokens: int = 250_000
+    embedding_batch_max_items: int = 2048
+    embedding_input_max_tokens: int = 8191
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = ".cache/embeddings.sqlite3"
+    embedding_cache_max_entries: int = 50_000
+
+    query_embedding_cache_size: int = 2048
+    query_embedding_cache_ttl_seconds: float = 3600.0
+    query_batch_max_wait_ms: float = 2.0
+    query_batch_max_size: int = 64
+
     chunk_max_tokens: int = 512
     chunk_overlap_tokens: int = 64
     retrieval_top_k: int = 20
+    context_token_budget: int = 6000
+    retrieval_mode: str = "vector"
+    rrf_k: int = 60
+    lexical_fast_path_enabled: bool = True
+    lexical_fast_path_min_margin: float = 1.5
+    speculative_retrieval_enabled: bool = True
+    answer_cache_enabled: bool = True
+    answer_cache_similarity_threshold: float = 0.95
+    answer_cache_max_entries: int = 2048
+    answer_cache_ttl_seconds: float = 3600.0
+    retrieval_cache_backend: str = "memory"
+    retrieval_cache_size: int = 1024
+    retrieval_cache_ttl_seconds: float = 900.0
+    retrieval_cache_redis_url: str = "redis://localhost:6379/0"
+    index_version_cache_size: int = 4096
+    index_version_cache_ttl_seconds: float = 30.0
+
+    pinecone_upsert_batch_size: int = 100
+    pinecone_upsert_max_bytes: int = 2_000_000
+    pinecone_upsert_concurrency: int = 4
+    pinecone_upsert_max_retries: int = 3
+    pinecone_delete_concurrency: int = 8
+    pinecone_namespace_per_document: bool = False
+
+    vector_store_backend: str = "pinecone"
+    local_index_enabled: bool = True
+    local_index_dir: str = ".cache/vector_index"
+    local_index_max_loaded_documents: int = 64
+    lexical_index_dir: str = ".cache/lexical_index"
+    lexical_index_max_loaded_documents: int = 64
+
+    supabase_pool_size: int = 16
+    storage_concurrency: int = 8
+
+    write_queue_max_size: int = 10_000
+    write_queue_batch_size: int = 100
+    write_queue_max_wait_ms: float = 50.0
+    write_queue_max_retries: int = 3
+    listing_page_size: int = 50
+    listing_max_page_size: int = 200
+    thread_messages_page_size: int = 100
+    thread_messages_max_page_size: int = 500
 
     azure_di_endpoint: str = ""
     azure_di_key: str = ""
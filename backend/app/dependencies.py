@@ -1,10 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
+import numpy as np
 from openai import AsyncOpenAI
 from pinecone import Pinecone
 from supabase import create_client, Client as SupabaseClient
 
 from app.config import settings
+from app.services.embedding_cache import EmbeddingCache
+from app.services.lexical_index import LexicalIndexStore
+from app.services.local_index import LocalVectorIndex
+from app.services.ttl_cache import TTLCache
 
 
 def get_azure_di_client():
@@ -31,3 +37,33 @@ def get_pinecone_index():
 @lru_cache
 def get_supabase_client() -> SupabaseClient:
     return create_client(settings.supabase_url, settings.supabase_key)
+
+
+@lru_cache
+def get_supabase_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=settings.supabase_pool_size, thread_name_prefix="supabase")
+
+
+@lru_cache
+def get_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(settings.embedding_cache_path, settings.embedding_cache_max_entries)
+
+
+@lru_cache
+def get_query_embedding_cache() -> TTLCache[tuple[str, str, int], np.ndarray]:
+    return TTLCache(settings.query_embedding_cache_size, settings.query_embedding_cache_ttl_seconds)
+
+
+@lru_cache
+def get_index_version_cache() -> TTLCache[str, str]:
+    return TTLCache(settings.index_version_cache_size, settings.index_version_cache_ttl_seconds)
+
+
+@lru_cache
+def get_local_index() -> LocalVectorIndex:
+    return LocalVectorIndex(settings.local_index_dir, settings.local_index_max_loaded_documents)
+
+
+@lru_cache
+def get_lexical_index() -> LexicalIndexStore:
+    return LexicalIndexStore(settings.lexical_index_dir, settings.lexical_index_max_loaded_documents)
@@ -5,7 +5,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.routers import chat, documents, reset, sections
+from app.routers import chat, documents, metrics, reset, sections
+from app.services.write_behind import get_write_queue
 
 if os.environ.get("APPLICATIONINSIGHTS_CONNECTION_STRING"):
     from azure.monitor.opentelemetry import configure_azure_monitor
@@ -15,7 +16,10 @@ if os.environ.get("APPLICATIONINSIGHTS_CONNECTION_STRING"):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    write_queue = get_write_queue()
+    write_queue.start()
     yield
+    await write_queue.stop()
 
 
 app = FastAPI(
@@ -30,10 +34,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Cursor-Id"],
 )
 
 app.include_router(chat.router)
 app.include_router(documents.router)
+app.include_router(metrics.router)
 app.include_router(reset.router)
 app.include_router(sections.router)
 
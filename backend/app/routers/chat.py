@@ -1,16 +1,19 @@
 from __future__ import annotations
 
 import json
+from datetime import datetime
+from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
+from pydantic import TypeAdapter
 from sse_starlette.sse import EventSourceResponse
 
+from app.config import settings
 from app.models.schemas import (
     ChatRequest,
     ClarifyRequest,
     DocumentId,
     FeedbackRequest,
-    MessageId,
     MessageRole,
     MessageType,
     QueryRoute,
@@ -18,27 +21,30 @@ from app.models.schemas import (
     ThreadResponse,
     MessageResponse,
     Citation,
-    ClarificationChip,
 )
 from app.services.clarification import generate_clarification_chips
 from app.services.query_router import classify_query
 from app.services.rag_pipeline import stream_general_response, stream_rag_response
+from app.services.speculation import SpeculativeRetrieval
 from app.services.supabase_client import (
-    create_message,
-    create_thread,
+    THREAD_SUMMARY_COLUMNS,
     delete_feedback,
     delete_thread,
-    get_feedback_for_messages,
     get_message,
-    get_messages,
     get_thread,
+    list_thread_messages,
     list_threads,
+    message_row,
+    thread_row,
     update_thread_title,
     upsert_feedback,
 )
+from app.services.write_behind import get_write_queue
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
+_message_list = TypeAdapter(list[MessageResponse])
+
 
 async def _generate_title(message: str) -> str:
     return message[:50].strip() + ("..." if len(message) > 50 else "")
@@ -46,44 +52,56 @@ async def _generate_title(message: str) -> str:
 
 @router.post("/chat")
 async def chat(request: ChatRequest):
+    write_queue = get_write_queue()
     thread_id = request.thread_id
     if not thread_id:
-        thread = create_thread(
+        thread_data = thread_row(
             document_id=request.document_id,
             title=await _generate_title(request.message),
         )
-        thread_id = ThreadId(thread["id"])
+        await write_queue.put("threads", thread_data)
+        thread_id = ThreadId(thread_data["id"])
     else:
-        existing = get_thread(thread_id)
-        if not existing:
+        thread_data = write_queue.pending_thread(thread_id) or await get_thread(thread_id)
+        if not thread_data:
             raise HTTPException(status_code=404, detail="Thread not found")
 
-    create_message(thread_id, MessageRole.USER, request.message)
+    await write_queue.put("messages", message_row(thread_id, MessageRole.USER, request.message))
 
     document_id = request.document_id
     if not document_id:
-        thread_data = get_thread(thread_id)
-        document_id = DocumentId(thread_data["document_id"]) if thread_data and thread_data.get("document_id") else None
+        document_id = DocumentId(thread_data["document_id"]) if thread_data.get("document_id") else None
 
     route = QueryRoute.GENERAL
+    speculative = None
     if document_id:
-        route = await classify_query(request.message)
+        if settings.speculative_retrieval_enabled:
+            speculative = SpeculativeRetrieval(request.message, document_id)
+        try:
+            route = await classify_query(request.message)
+        except BaseException:
+            if speculative is not None:
+                speculative.discard()
+            raise
+        if speculative is not None and route != QueryRoute.KB:
+            speculative.discard()
+            speculative = None
 
     async def event_stream():
         yield {"event": "thread_id", "data": thread_id}
 
         if route == QueryRoute.NEEDS_CLARIFICATION:
-            chips = generate_clarification_chips(document_id, request.message)
+            chips = await generate_clarification_chips(document_id, request.message)
             chip_data = [c.model_dump() for c in chips]
             yield {"event": "clarification", "data": json.dumps(chip_data)}
 
-            create_message(
+            await write_queue.put("messages", message_row(
                 thread_id,
                 MessageRole.ASSISTANT,
                 "I found multiple relevant sections. Which area would you like me to focus on?",
                 message_type=MessageType.CLARIFICATION,
                 clarification_chips=chips,
-            )
+            ))
             yield {"event": "done", "data": ""}
             return
 
@@ -91,7 +109,9 @@ async def chat(request: ChatRequest):
         citations_list: list[Citation] = []
 
         if route == QueryRoute.KB and document_id:
-            async for event_type, data, cites in stream_rag_response(request.message, document_id):
+            async for event_type, data, cites in stream_rag_response(
+                request.message, document_id, prefetch=speculative.result if speculative is not None else None
+            ):
                 if event_type == "citations":
                     yield {"event": "citations", "data": data}
                 elif event_type == "token":
@@ -99,6 +119,8 @@ async def chat(request: ChatRequest):
                     yield {"event": "token", "data": data}
                 elif event_type == "done" and cites:
                     citations_list = cites
+            if speculative is not None and not speculative.consumed:
+                speculative.discard()
         else:
             async for event_type, data, _ in stream_general_response(request.message):
                 if event_type == "token":
@@ -106,13 +128,13 @@ async def chat(request: ChatRequest):
                     yield {"event": "token", "data": data}
 
         msg_type = MessageType.KB if route == QueryRoute.KB else MessageType.GENERAL
-        create_message(
+        await write_queue.put("messages", message_row(
             thread_id,
             MessageRole.ASSISTANT,
             full_content,
             message_type=msg_type,
             citations=citations_list if citations_list else None,
-        )
+        ))
 
         yield {"event": "done", "data": ""}
 
@@ -121,11 +143,15 @@ async def chat(request: ChatRequest):
 
 @router.post("/chat/clarify")
 async def chat_clarify(request: ClarifyRequest):
-    existing = get_thread(request.thread_id)
+    write_queue = get_write_queue()
+    existing = write_queue.pending_thread(request.thread_id) or await get_thread(request.thread_id)
     if not existing:
         raise HTTPException(status_code=404, detail="Thread not found")
 
-    create_message(request.thread_id, MessageRole.USER, f"[{request.section_heading}] {request.message}")
+    await write_queue.put(
+        "messages",
+        message_row(request.thread_id, MessageRole.USER, f"[{request.section_heading}] {request.message}"),
+    )
 
     async def event_stream():
         full_content = ""
@@ -144,13 +170,13 @@ async def chat_clarify(request: ClarifyRequest):
             elif event_type == "done" and cites:
                 citations_list = cites
 
-        create_message(
+        await write_queue.put("messages", message_row(
             request.thread_id,
             MessageRole.ASSISTANT,
             full_content,
             message_type=MessageType.KB,
             citations=citations_list if citations_list else None,
-        )
+        ))
 
         yield {"event": "done", "data": ""}
 
@@ -158,8 +184,23 @@ async def chat_clarify(request: ClarifyRequest):
 
 
 @router.get("/threads", response_model=list[ThreadResponse])
-async def get_threads():
-    threads = list_threads()
+async def get_threads(
+    response: Response,
+    before: datetime | None = None,
+    before_id: UUID | None = None,
+    limit: int | None = Query(default=None, ge=1, le=settings.listing_max_page_size),
+):
+    await get_write_queue().flush()
+    limit = limit or settings.listing_page_size
+    threads = await list_threads(
+        before=before.isoformat() if before else None,
+        before_id=str(before_id) if before_id else None,
+        limit=limit,
+        columns=THREAD_SUMMARY_COLUMNS,
+    )
+    if len(threads) == limit:
+        response.headers["X-Next-Cursor"] = threads[-1]["created_at"]
+        response.headers["X-Next-Cursor-Id"] = threads[-1]["id"]
     return [
         ThreadResponse(
             id=ThreadId(t["id"]),
@@ -172,43 +213,46 @@ async def get_threads():
 
 
 @router.get("/threads/{thread_id}/messages", response_model=list[MessageResponse])
-async def get_thread_messages(thread_id: str):
-    messages = get_messages(thread_id)
-    message_ids = [m["id"] for m in messages]
-    feedback_map = get_feedback_for_messages(message_ids)
-    return [
-        MessageResponse(
-            id=MessageId(m["id"]),
-            thread_id=ThreadId(m["thread_id"]),
-            role=MessageRole(m["role"]),
-            content=m["content"],
-            citations=[Citation(**c) for c in m["citations"]] if m.get("citations") else None,
-            clarification_chips=[ClarificationChip(**c) for c in m["clarification_chips"]] if m.get("clarification_chips") else None,
-            message_type=MessageType(m["message_type"]) if m.get("message_type") else None,
-            feedback=feedback_map.get(m["id"]),
-            created_at=m["created_at"],
-        )
-        for m in messages
-    ]
+async def get_thread_messages(
+    thread_id: str,
+    response: Response,
+    before: datetime | None = None,
+    before_id: UUID | None = None,
+    limit: int | None = Query(default=None, ge=1, le=settings.thread_messages_max_page_size),
+):
+    await get_write_queue().flush()
+    limit = limit or settings.thread_messages_page_size
+    messages = await list_thread_messages(
+        thread_id,
+        before=before.isoformat() if before else None,
+        before_id=str(before_id) if before_id else None,
+        limit=limit,
+    )
+    if len(messages) == limit:
+        response.headers["X-Next-Cursor"] = messages[0]["created_at"]
+        response.headers["X-Next-Cursor-Id"] = messages[0]["id"]
+    return _message_list.validate_python(messages)
 
 
 @router.put("/messages/{message_id}/feedback")
 async def put_feedback(message_id: str, body: FeedbackRequest):
-    if not get_message(message_id):
+    await get_write_queue().flush()
+    if not await get_message(message_id):
         raise HTTPException(status_code=404, detail="Message not found")
-    upsert_feedback(message_id, body.signal.value)
+    await upsert_feedback(message_id, body.signal.value)
     return {"status": "ok"}
 
 
 @router.delete("/messages/{message_id}/feedback", status_code=204)
 async def remove_feedback(message_id: str):
-    delete_feedback(message_id)
+    await delete_feedback(message_id)
 
 
 @router.delete("/threads/{thread_id}", status_code=204)
 async def remove_thread(thread_id: str):
-    existing = get_thread(thread_id)
+    await get_write_queue().flush()
+    existing = await get_thread(thread_id)
     if not existing:
         raise HTTPException(status_code=404, detail="Thread not found")
-    delete_thread(thread_id)
+    await delete_thread(thread_id)
 
@@ -1,18 +1,27 @@
 from __future__ import annotations
 
-import httpx
-from fastapi import APIRouter, BackgroundTasks, UploadFile, File, HTTPException
+import asyncio
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, HTTPException, Query
 from starlette.responses import Response
 
 from app.config import settings
+from app.dependencies import get_lexical_index
 from app.models.schemas import DocumentId, DocumentResponse, DocumentStatus, DocumentUploadResponse
 from app.services.document_processor import process_document
-from app.services.pinecone_store import delete_document_vectors
+from app.services.storage import delete_prefix
+from app.services.vector_store import delete_document_vectors
+from app.services.write_behind import get_write_queue
 from app.services.supabase_client import (
+    DOCUMENT_SUMMARY_COLUMNS,
     create_document,
     delete_document,
     get_document,
     list_documents,
+    rename_document,
+    update_document_status,
 )
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
@@ -27,7 +36,7 @@ async def upload_document(background_tasks: BackgroundTasks, file: UploadFile =
     if len(file_bytes) > 50 * 1024 * 1024:
         raise HTTPException(status_code=400, detail="File too large (max 50MB)")
 
-    doc = create_document(filename=file.filename)
+    doc = await create_document(filename=file.filename)
     document_id = doc["id"]
 
     background_tasks.add_task(process_document, document_id, file_bytes, file.filename)
@@ -38,9 +47,48 @@ async def upload_document(background_tasks: BackgroundTasks, file: UploadFile =
     )
 
 
+@router.put("/{document_id}", response_model=DocumentUploadResponse)
+async def replace_document(document_id: str, background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    if not file.filename or not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted")
+
+    file_bytes = await file.read()
+    if len(file_bytes) > 50 * 1024 * 1024:
+        raise HTTPException(status_code=400, detail="File too large (max 50MB)")
+
+    doc = await get_document(document_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    if doc["filename"] != file.filename:
+        await rename_document(document_id, file.filename)
+    await update_document_status(document_id, DocumentStatus.PENDING)
+
+    background_tasks.add_task(process_document, document_id, file_bytes, file.filename, replace=True)
+
+    return DocumentUploadResponse(
+        document_id=DocumentId(document_id),
+        status=DocumentStatus.PENDING,
+    )
+
+
 @router.get("", response_model=list[DocumentResponse])
-async def get_documents():
-    docs = list_documents()
+async def get_documents(
+    response: Response,
+    before: datetime | None = None,
+    before_id: UUID | None = None,
+    limit: int | None = Query(default=None, ge=1, le=settings.listing_max_page_size),
+):
+    limit = limit or settings.listing_page_size
+    docs = await list_documents(
+        before=before.isoformat() if before else None,
+        before_id=str(before_id) if before_id else None,
+        limit=limit,
+        columns=DOCUMENT_SUMMARY_COLUMNS,
+    )
+    if len(docs) == limit:
+        response.headers["X-Next-Cursor"] = docs[-1]["created_at"]
+        response.headers["X-Next-Cursor-Id"] = docs[-1]["id"]
     return [
         DocumentResponse(
             id=DocumentId(d["id"]),
@@ -48,7 +96,6 @@ async def get_documents():
             blob_url=d.get("blob_url"),
             status=DocumentStatus(d["status"]),
             page_count=d.get("page_count"),
-            sections=d.get("sections"),
             created_at=d.get("created_at"),
         )
         for d in docs
@@ -57,45 +104,21 @@ async def get_documents():
 
 @router.delete("/{document_id}", status_code=204)
 async def remove_document(document_id: str):
-    doc = get_document(document_id)
+    doc = await get_document(document_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    delete_document_vectors(document_id)
-
-    bucket = settings.supabase_storage_bucket
-    async with httpx.AsyncClient() as http:
-        list_resp = await http.get(
-            f"{settings.supabase_url}/storage/v1/object/list/{bucket}",
-            headers={
-                "Authorization": f"Bearer {settings.supabase_key}",
-                "apikey": settings.supabase_key,
-            },
-            params={"prefix": document_id, "limit": 100},
-            timeout=30.0,
-        )
-        if list_resp.status_code == 200:
-            files = list_resp.json()
-            file_paths = [f"{document_id}/{f['name']}" for f in files if f.get("name")]
-            if file_paths:
-                await http.delete(
-                    f"{settings.supabase_url}/storage/v1/object/{bucket}",
-                    headers={
-                        "Authorization": f"Bearer {settings.supabase_key}",
-                        "apikey": settings.supabase_key,
-                        "Content-Type": "application/json",
-                    },
-                    json={"prefixes": file_paths},
-                    timeout=30.0,
-                )
-
-    delete_document(document_id)
+    await get_write_queue().flush()
+    await delete_document_vectors(document_id)
+    await asyncio.to_thread(get_lexical_index().delete, document_id)
+    await delete_prefix(document_id)
+    await delete_document(document_id)
     return Response(status_code=204)
 
 
 @router.get("/{document_id}/status")
 async def get_document_status(document_id: str):
-    doc = get_document(document_id)
+    doc = await get_document(document_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     return {"status": doc["status"], "page_count": doc.get("page_count")}
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from app.config import settings
+from app.dependencies import get_embedding_cache, get_lexical_index, get_local_index, get_query_embedding_cache
+from app.services.answer_cache import get_answer_cache
+from app.services.embedder import get_query_batcher
+from app.services.retrieval_cache import get_retrieval_cache
+from app.services.speculation import get_speculation_stats
+from app.services.write_behind import get_write_queue
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("")
+async def get_metrics():
+    metrics: dict[str, dict] = {
+        "query_embedding_cache": get_query_embedding_cache().stats(),
+        "query_batcher": get_query_batcher().stats(),
+        "speculative_retrieval": get_speculation_stats().stats(),
+        "write_queue": get_write_queue().stats(),
+    }
+    if settings.answer_cache_enabled:
+        metrics["answer_cache"] = get_answer_cache().stats()
+    retrieval_cache = get_retrieval_cache()
+    if retrieval_cache is not None:
+        metrics["retrieval_cache"] = retrieval_cache.stats()
+    if settings.local_index_enabled:
+        metrics["local_index"] = get_local_index().stats()
+    if settings.retrieval_mode == "hybrid":
+        metrics["lexical_index"] = get_lexical_index().stats()
+    if settings.embedding_cache_enabled:
+        metrics["embedding_cache"] = get_embedding_cache().stats()
+    return metrics
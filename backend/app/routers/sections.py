@@ -10,7 +10,7 @@ router = APIRouter(prefix="/api/documents", tags=["sections"])
 
 @router.get("/{document_id}/sections", response_model=list[SectionResponse])
 async def get_document_sections(document_id: str):
-    sections = get_sections(document_id)
+    sections = await get_sections(document_id)
     if not sections:
         raise HTTPException(status_code=404, detail="No sections found for this document")
     return [
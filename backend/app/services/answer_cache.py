@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from app.config import settings
+from app.models.schemas import Citation
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def query_numbers(query: str) -> frozenset[str]:
+    return frozenset(_NUMBER_PATTERN.findall(query))
+
+
+@dataclass
+class CachedAnswer:
+    document_id: str
+    section_filter: str | None
+    numbers: frozenset[str]
+    version: int | None
+    embedding: np.ndarray
+    answer: str
+    citations: list[Citation]
+    expires_at: float
+
+
+class SemanticAnswerCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._by_document: dict[str, set[int]] = {}
+        self._generations: dict[str, int] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def generation(self, document_id: str) -> int:
+        return self._generations.get(document_id, 0)
+
+    def lookup(
+        self,
+        document_id: str,
+        query: str,
+        query_embedding: np.ndarray,
+        section_filter: str | None = None,
+        version: int | None = None,
+    ) -> CachedAnswer | None:
+        numbers = query_numbers(query)
+        embedding = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(embedding))
+        now = time.monotonic()
+        with self._lock:
+            candidates = []
+            for entry_id in list(self._by_document.get(document_id, ())):
+                entry = self._entries[entry_id]
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                elif (
+                    entry.section_filter == section_filter
+                    and entry.numbers == numbers
+                    and entry.version == version
+                ):
+                    candidates.append(entry_id)
+            if not candidates or norm == 0:
+                self.misses += 1
+                return None
+            similarities = np.stack([self._entries[i].embedding for i in candidates]) @ (embedding / norm)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(candidates[best])
+            self.hits += 1
+            return self._entries[candidates[best]]
+
+    def store(
+        self,
+        document_id: str,
+        query: str,
+        query_embedding: np.ndarray,
+        section_filter: str | None,
+        answer: str,
+        citations: list[Citation],
+        generation: int,
+        version: int | None = None,
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+        embedding = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(embedding))
+        if norm == 0:
+            return
+        with self._lock:
+            if self.generation(document_id) != generation:
+                return
+            entry_id = next(self._ids)
+            self._entries[entry_id] = CachedAnswer(
+                document_id=document_id,
+                section_filter=section_filter,
+                numbers=query_numbers(query),
+                version=version,
+                embedding=embedding / norm,
+                answer=answer,
+                citations=citations,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+            self._by_document.setdefault(document_id, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_document(self, document_id: str) -> None:
+        with self._lock:
+            self._generations[document_id] = self.generation(document_id) + 1
+            for entry_id in list(self._by_document.get(document_id, ())):
+                self._remove(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        ids = self._by_document.get(entry.document_id)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_document[entry.document_id]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity_threshold": self.threshold,
+            "documents": len(self._by_document),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+@lru_cache
+def get_answer_cache() -> SemanticAnswerCache:
+    return SemanticAnswerCache(
+        settings.answer_cache_max_entries,
+        settings.answer_cache_ttl_seconds,
+        settings.answer_cache_similarity_threshold,
+    )
@@ -4,8 +4,8 @@ from app.models.schemas import ClarificationChip
 from app.services.supabase_client import get_sections
 
 
-def generate_clarification_chips(document_id: str, query: str) -> list[ClarificationChip]:
-    sections = get_sections(document_id)
+async def generate_clarification_chips(document_id: str, query: str) -> list[ClarificationChip]:
+    sections = await get_sections(document_id)
     if not sections:
         return []
 
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class Passage:
+    text: str
+    section_heading: str
+    page_start: int
+    page_end: int
+    score: float
+    rank_score: float
+    token_count: int
+    chunk_ids: list[str] = field(default_factory=list)
+
+
+def _rank_score(hit: dict) -> float:
+    return hit.get("rrf_score", hit.get("score", 0.0))
+
+
+def _token_count(hit: dict, text: str) -> int:
+    count = hit.get("token_count")
+    return int(count) if count else max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def overlap_length(previous: str, following: str) -> int:
+    start = max(0, len(previous) - len(following))
+    for position in range(start, len(previous)):
+        if position > 0 and previous[position - 1] != " ":
+            continue
+        suffix = previous[position:]
+        if following.startswith(suffix):
+            return len(suffix)
+    return 0
+
+
+def _merge_run(run: list[tuple[dict, str]]) -> Passage:
+    first_hit, text = run[0]
+    tokens = _token_count(first_hit, text)
+    for hit, chunk_text in run[1:]:
+        overlap = overlap_length(text, chunk_text)
+        chunk_tokens = _token_count(hit, chunk_text)
+        if overlap:
+            chunk_tokens -= round(chunk_tokens * overlap / len(chunk_text))
+        remainder = chunk_text[overlap:].lstrip()
+        if remainder:
+            text = f"{text} {remainder}"
+        tokens += chunk_tokens
+    hits = [hit for hit, _ in run]
+    return Passage(
+        text=text,
+        section_heading=first_hit.get("section_heading", ""),
+        page_start=min(hit.get("page_start", 0) for hit in hits),
+        page_end=max(hit.get("page_end", 0) for hit in hits),
+        score=max(hit.get("score", 0.0) for hit in hits),
+        rank_score=max(_rank_score(hit) for hit in hits),
+        token_count=tokens,
+        chunk_ids=[hit["id"] for hit in hits],
+    )
+
+
+def pack_context(results: list[dict], chunk_texts: dict[str, str], budget_tokens: int) -> list[Passage]:
+    seen_texts: set[str] = set()
+    unique: list[tuple[dict, str]] = []
+    for hit in sorted(results, key=_rank_score, reverse=True):
+        text = hit.get("chunk_text") or chunk_texts.get(hit["id"], "")
+        if not text or text in seen_texts:
+            continue
+        seen_texts.add(text)
+        unique.append((hit, text))
+
+    unique.sort(key=lambda item: (item[0].get("section_heading", ""), item[0].get("chunk_index", 0)))
+    runs: list[list[tuple[dict, str]]] = []
+    for hit, text in unique:
+        if runs:
+            last_hit = runs[-1][-1][0]
+            if (
+                last_hit.get("section_heading", "") == hit.get("section_heading", "")
+                and "chunk_index" in hit
+                and last_hit.get("chunk_index") == hit["chunk_index"] - 1
+            ):
+                runs[-1].append((hit, text))
+                continue
+        runs.append([(hit, text)])
+
+    passages = sorted((_merge_run(run) for run in runs), key=lambda p: p.rank_score, reverse=True)
+    if budget_tokens <= 0:
+        return passages
+
+    packed: list[Passage] = []
+    used = 0
+    for passage in passages:
+        if packed and used + passage.token_count > budget_tokens:
+            continue
+        packed.append(passage)
+        used += passage.token_count
+    return packed
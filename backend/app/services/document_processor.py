@@ -1,17 +1,34 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
 import tempfile
 
 import httpx
 
 from app.config import settings
+from app.dependencies import get_lexical_index
 from app.models.schemas import DocumentStatus
 from app.services.chunker import Chunk, chunk_document, chunk_structured_document
 from app.services.embedder import embed_texts
 from app.services.pdf_parser import parse_pdf
-from app.services.pinecone_store import upsert_chunks
-from app.services.supabase_client import create_sections, update_document_status
+from app.services.vector_store import (
+    chunk_metadata,
+    delete_chunk_vectors,
+    invalidate_document_caches,
+    refresh_local_copy,
+    upsert_chunks,
+    vector_id,
+)
+from app.services.supabase_client import (
+    create_chunks,
+    create_sections,
+    delete_chunks,
+    delete_sections,
+    get_chunk_hashes,
+    update_document_status,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -100,9 +117,33 @@ def _azure_di_parse(file_bytes: bytes) -> tuple[list[Chunk], list[dict], int]:
     return chunks, sections_list, structured.page_count
 
 
-async def process_document(document_id: str, file_bytes: bytes, filename: str) -> None:
+def _chunk_hash(chunk: Chunk) -> str:
+    fields = (
+        chunk.embedding_text or chunk.text,
+        chunk.text,
+        chunk.section_heading,
+        chunk.section_level,
+        chunk.parent_section,
+        chunk.content_type,
+        chunk.page_start,
+        chunk.page_end,
+    )
+    return hashlib.sha256("\0".join(str(f) for f in fields).encode()).hexdigest()
+
+
+def _index_version(hashes: dict[int, str]) -> str:
+    entries = (f"{chunk_index}:{hashes[chunk_index]}" for chunk_index in sorted(hashes))
+    return hashlib.sha256("\n".join(entries).encode()).hexdigest()
+
+
+async def process_document(
+    document_id: str,
+    file_bytes: bytes,
+    filename: str,
+    replace: bool = False,
+) -> None:
     try:
-        update_document_status(document_id, DocumentStatus.PROCESSING)
+        await update_document_status(document_id, DocumentStatus.PROCESSING)
 
         storage_path = f"{document_id}/{filename}"
         blob_url = await upload_to_supabase_storage(file_bytes, storage_path)
@@ -125,37 +166,79 @@ async def process_document(document_id: str, file_bytes: bytes, filename: str) -
         else:
             chunks, sections_list, _ = _fallback_parse(file_bytes)
 
-        update_document_status(
+        await update_document_status(
             document_id,
             DocumentStatus.PROCESSING,
             page_count=page_count,
         )
 
         if not chunks:
-            update_document_status(document_id, DocumentStatus.FAILED)
+            await update_document_status(document_id, DocumentStatus.FAILED)
             return
 
+        hashes = [_chunk_hash(c) for c in chunks]
+        previous = await get_chunk_hashes(document_id) if replace else {}
+        changed = [
+            (chunk, content_hash)
+            for chunk, content_hash in zip(chunks, hashes)
+            if previous.get(chunk.chunk_index) != content_hash
+        ]
+        removed = sorted(set(previous) - {c.chunk_index for c in chunks})
+        version = _index_version({c.chunk_index: content_hash for c, content_hash in zip(chunks, hashes)})
+        base_version = _index_version(previous) if previous else None
+
         texts = [c.embedding_text or c.text for c in chunks]
-        embeddings = await embed_texts(texts)
+        await asyncio.to_thread(
+            get_lexical_index().write,
+            document_id,
+            [vector_id(document_id, c.chunk_index) for c in chunks],
+            [chunk_metadata(document_id, c) for c in chunks],
+            texts,
+            version,
+        )
+
+        changed_chunks = [c for c, _ in changed]
+        embeddings = None
+        if changed:
+            embeddings = await embed_texts([c.embedding_text or c.text for c in changed_chunks])
+            await upsert_chunks(document_id, changed_chunks, embeddings)
+            await create_chunks(
+                document_id,
+                [
+                    {"chunk_index": c.chunk_index, "chunk_text": c.text, "content_hash": content_hash}
+                    for c, content_hash in changed
+                ],
+            )
+
+        removed_ids = [vector_id(document_id, i) for i in removed]
+        if removed:
+            await delete_chunk_vectors(document_id, removed_ids)
+            await delete_chunks(document_id, removed)
 
-        upsert_chunks(document_id, chunks, embeddings)
+        if changed or removed:
+            await refresh_local_copy(document_id, version, base_version, changed_chunks, embeddings, removed_ids)
+            await invalidate_document_caches(document_id)
 
+        if replace:
+            await delete_sections(document_id)
         if sections_list:
-            create_sections(document_id, sections_list)
+            await create_sections(document_id, sections_list)
 
-        update_document_status(
+        await update_document_status(
             document_id,
             DocumentStatus.READY,
             page_count=page_count,
             sections=sections_list,
+            index_version=version,
         )
 
         logger.info(
-            f"Document {document_id} processed: {len(chunks)} chunks, "
+            f"Document {document_id} processed: {len(chunks)} chunks "
+            f"({len(changed)} embedded, {len(removed)} removed), "
             f"{len(sections_list)} sections, {page_count} pages"
         )
 
     except Exception as e:
         logger.exception(f"Failed to process document {document_id}: {e}")
-        update_document_status(document_id, DocumentStatus.FAILED)
+        await update_document_status(document_id, DocumentStatus.FAILED)
         raise
@@ -1,26 +1,75 @@
 from __future__ import annotations
 
+import asyncio
+from functools import lru_cache
+
+import numpy as np
+
 from app.config import settings
-from app.dependencies import get_openai_client
+from app.dependencies import get_embedding_cache, get_query_embedding_cache
+from app.services.embedding_backends import embedding_dtype, get_embedding_backend
+from app.services.embedding_cache import cache_key
+from app.services.embedding_scheduler import MicroBatcher
+
+
+async def embed_texts(texts: list[str]) -> np.ndarray:
+    if not texts:
+        return np.empty((0, settings.embedding_dimensions), dtype=embedding_dtype())
+    backend = get_embedding_backend()
+    if not settings.embedding_cache_enabled:
+        return await backend.embed(texts)
+
+    cache = get_embedding_cache()
+    keys = [cache_key(text, backend.model, settings.embedding_dimensions) for text in texts]
+    cached = await asyncio.to_thread(cache.get_many, list(dict.fromkeys(keys)))
+
+    missing: dict[bytes, int] = {}
+    for i, key in enumerate(keys):
+        if key not in cached and key not in missing:
+            missing[key] = i
+
+    if missing:
+        positions = list(missing.values())
+        fresh = await backend.embed([texts[i] for i in positions])
+        new_entries = dict(zip(missing.keys(), fresh))
+        await asyncio.to_thread(cache.put_many, new_entries)
+        cached.update(new_entries)
+
+    return np.stack([cached[key] for key in keys]).astype(embedding_dtype(), copy=False)
+
+
+async def _embed_queries(queries: list[str]) -> np.ndarray:
+    return await get_embedding_backend().embed(queries)
+
+
+@lru_cache
+def get_query_batcher() -> MicroBatcher[str, np.ndarray]:
+    return MicroBatcher(
+        _embed_queries,
+        max_wait_seconds=settings.query_batch_max_wait_ms / 1000,
+        max_batch_size=settings.query_batch_max_size,
+    )
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
 
+def _query_key(query: str) -> tuple[str, str, int]:
+    return (normalize_query(query), get_embedding_backend().model, settings.embedding_dimensions)
 
-async def embed_texts(texts: list[str]) -> list[list[float]]:
-    client = get_openai_client()
-    all_embeddings: list[list[float]] = []
-    batch_size = 100
 
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i : i + batch_size]
-        response = await client.embeddings.create(
-            model=settings.openai_embedding_model,
-            input=batch,
-            dimensions=settings.embedding_dimensions,
-        )
-        all_embeddings.extend([item.embedding for item in response.data])
+def cached_query_embedding(query: str) -> np.ndarray | None:
+    return get_query_embedding_cache().peek(_query_key(query))
 
-    return all_embeddings
 
+async def embed_query(query: str) -> np.ndarray:
+    cache = get_query_embedding_cache()
+    key = _query_key(query)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
 
-async def embed_query(query: str) -> list[float]:
-    result = await embed_texts([query])
-    return result[0]
+    embedding = await get_query_batcher().submit(query)
+    cache.set(key, embedding)
+    return embedding
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from functools import lru_cache
+
+import numpy as np
+import openai
+import tiktoken
+
+from app.config import settings
+from app.dependencies import get_openai_client
+from app.services.embedding_scheduler import BatchScheduler, RateLimited, TransientError
+from app.services.lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_dtype() -> np.dtype:
+    return np.dtype(settings.embedding_dtype)
+
+
+class EmbeddingBackend(ABC):
+    model: str
+
+    @abstractmethod
+    async def embed(self, texts: list[str]) -> np.ndarray: ...
+
+
+def _decode_embedding(embedding: str | list[float]) -> np.ndarray:
+    if isinstance(embedding, str):
+        return np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+    return np.asarray(embedding, dtype=np.float32)
+
+
+@lru_cache
+def embedding_encoding() -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(settings.openai_embedding_model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def _cap_token_ids(token_ids: list[np.ndarray]) -> list[np.ndarray]:
+    limit = settings.embedding_input_max_tokens
+    capped = []
+    for i, tokens in enumerate(token_ids):
+        if len(tokens) > limit:
+            logger.warning(
+                f"Embedding input {i} has {len(tokens)} tokens, truncating to {limit}"
+            )
+            tokens = tokens[:limit]
+        capped.append(tokens)
+    return capped
+
+
+def _pack_batches(token_counts: list[int], max_tokens: int, max_items: int) -> list[tuple[int, int]]:
+    batches: list[tuple[int, int]] = []
+    start = 0
+    batch_tokens = 0
+    for i, count in enumerate(token_counts):
+        if i > start and (batch_tokens + count > max_tokens or i - start >= max_items):
+            batches.append((start, i))
+            start = i
+            batch_tokens = 0
+        batch_tokens += count
+    if start < len(token_counts):
+        batches.append((start, len(token_counts)))
+    return batches
+
+
+async def _create_embeddings(batch: list[np.ndarray]) -> tuple[np.ndarray, Mapping[str, str]]:
+    client = get_openai_client().with_options(max_retries=0)
+    try:
+        raw = await client.embeddings.with_raw_response.create(
+            model=settings.openai_embedding_model,
+            input=[tokens.tolist() for tokens in batch],
+            dimensions=settings.embedding_dimensions,
+            encoding_format="base64",
+        )
+    except openai.RateLimitError as e:
+        raise RateLimited(e.response.headers) from e
+    except (openai.APIConnectionError, openai.InternalServerError) as e:
+        raise TransientError(str(e)) from e
+    response = raw.parse()
+    matrix = np.empty((len(response.data), settings.embedding_dimensions), dtype=embedding_dtype())
+    for item in response.data:
+        matrix[item.index] = _decode_embedding(item.embedding)
+    return matrix, raw.headers
+
+
+@lru_cache
+def get_embedding_scheduler() -> BatchScheduler[list[np.ndarray], np.ndarray]:
+    return BatchScheduler(
+        max_concurrency=settings.embedding_max_concurrency,
+        max_retries=settings.embedding_max_retries,
+    )
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    def __init__(self):
+        self.model = settings.openai_embedding_model
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        encoded = await asyncio.to_thread(embedding_encoding().encode_batch, texts)
+        inputs = _cap_token_ids([np.asarray(tokens, dtype=np.uint32) for tokens in encoded])
+        token_counts = [len(tokens) for tokens in inputs]
+
+        batches = [
+            inputs[start:end]
+            for start, end in _pack_batches(
+                token_counts,
+                max_tokens=settings.embedding_batch_max_tokens,
+                max_items=settings.embedding_batch_max_items,
+            )
+        ]
+
+        results = await get_embedding_scheduler().run(batches, _create_embeddings)
+        return np.concatenate(results).astype(embedding_dtype(), copy=False)
+
+
+class LocalHashingEmbeddingBackend(EmbeddingBackend):
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.model = f"local-hashing-v1-{dimensions}"
+
+    def _features(self, text: str) -> list[str]:
+        words = tokenize(text)
+        bigrams = [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return words + bigrams
+
+    def embed_sync(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter(
+                (zlib.crc32(feature.encode()) for feature in self._features(text)),
+                dtype=np.uint32,
+            )
+            if not hashes.size:
+                continue
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], (hashes % self.dimensions).astype(np.intp), signs)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix.astype(embedding_dtype(), copy=False)
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        return await asyncio.to_thread(self.embed_sync, texts)
+
+
+@lru_cache
+def get_embedding_backend() -> EmbeddingBackend:
+    if settings.embedding_backend == "openai":
+        return OpenAIEmbeddingBackend()
+    if settings.embedding_backend == "local":
+        return LocalHashingEmbeddingBackend(settings.embedding_dimensions)
+    raise ValueError(f"Unknown embedding backend: {settings.embedding_backend}")
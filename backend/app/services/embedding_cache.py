@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def cache_key(text: str, model: str, dimensions: int) -> bytes:
+    return hashlib.sha256(f"{model}\x00{dimensions}\x00{text}".encode()).digest()
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_entries: int):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute("pragma synchronous=normal")
+        self._conn.execute(
+            "create table if not exists embeddings ("
+            " key blob primary key,"
+            " vector blob not null,"
+            " last_used integer not null)"
+        )
+        self._conn.execute("create index if not exists idx_embeddings_last_used on embeddings(last_used)")
+        self._conn.commit()
+        self._entries = self._conn.execute("select count(*) from embeddings").fetchone()[0]
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        found: dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"select key, vector from embeddings where key in ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time_ns()
+                self._conn.executemany(
+                    "update embeddings set last_used = ? where key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: dict[bytes, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time_ns()
+        with self._lock:
+            cursor = self._conn.executemany(
+                "insert or ignore into embeddings (key, vector, last_used) values (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in items.items()
+                ],
+            )
+            self._entries += max(cursor.rowcount, 0)
+            if self._entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        target = int(self.max_entries * 0.9)
+        excess = self._entries - target
+        cursor = self._conn.execute(
+            "delete from embeddings where key in ("
+            " select key from embeddings order by last_used limit ?)",
+            (excess,),
+        )
+        self.evictions += cursor.rowcount
+        self._entries -= cursor.rowcount
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from typing import Generic, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+LOW_QUOTA_FRACTION = 0.1
+
+
+class RateLimited(Exception):
+    def __init__(self, headers: Mapping[str, str] | None = None):
+        super().__init__("rate limited")
+        self.headers = headers or {}
+
+
+class TransientError(Exception):
+    pass
+
+
+def parse_duration(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> float | None:
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    for key in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        seconds = parse_duration(headers.get(key))
+        if seconds is not None:
+            return seconds
+    return None
+
+
+def _remaining_fraction(headers: Mapping[str, str]) -> float | None:
+    fractions = []
+    for kind in ("requests", "tokens"):
+        try:
+            remaining = float(headers[f"x-ratelimit-remaining-{kind}"])
+            limit = float(headers[f"x-ratelimit-limit-{kind}"])
+        except (KeyError, ValueError):
+            continue
+        if limit > 0:
+            fractions.append(remaining / limit)
+    return min(fractions) if fractions else None
+
+
+class BatchScheduler(Generic[T, R]):
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_retries: int = 5,
+        base_backoff: float = 0.5,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.concurrency = self.max_concurrency
+        self.peak_in_flight = 0
+        self.rate_limited_count = 0
+        self._in_flight = 0
+        self._resume_at = 0.0
+        self._cond = asyncio.Condition()
+
+    async def run(
+        self,
+        batches: Sequence[T],
+        request: Callable[[T], Awaitable[tuple[R, Mapping[str, str]]]],
+    ) -> list[R]:
+        results: list[R | None] = [None] * len(batches)
+
+        async def run_one(position: int, batch: T) -> None:
+            results[position] = await self._run_with_retries(batch, request)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                for position, batch in enumerate(batches):
+                    group.create_task(run_one(position, batch))
+        except BaseExceptionGroup as eg:
+            raise eg.exceptions[0]
+
+        return cast(list[R], results)
+
+    async def _run_with_retries(
+        self,
+        batch: T,
+        request: Callable[[T], Awaitable[tuple[R, Mapping[str, str]]]],
+    ) -> R:
+        attempt = 0
+        while True:
+            await self._acquire()
+            try:
+                result, headers = await request(batch)
+            except RateLimited as exc:
+                attempt += 1
+                if attempt <= self.max_retries:
+                    self._on_rate_limited(exc.headers, attempt)
+                await self._release()
+                if attempt > self.max_retries:
+                    raise
+                continue
+            except TransientError as exc:
+                attempt += 1
+                await self._release()
+                if attempt > self.max_retries:
+                    raise
+                delay = self.base_backoff * 2 ** (attempt - 1)
+                logger.warning(f"Embeddings request failed (attempt {attempt}), retrying in {delay:.2f}s: {exc}")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                await self._release()
+                raise
+            self._on_success(headers)
+            await self._release()
+            return result
+
+    async def _acquire(self) -> None:
+        while True:
+            delay = self._resume_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            async with self._cond:
+                if self._resume_at > time.monotonic():
+                    continue
+                if self._in_flight < self.concurrency:
+                    self._in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+                    return
+                await self._cond.wait()
+
+    async def _release(self) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _on_success(self, headers: Mapping[str, str]) -> None:
+        fraction = _remaining_fraction(headers)
+        if fraction is not None and fraction < LOW_QUOTA_FRACTION:
+            self.concurrency = max(1, self.concurrency - 1)
+            if fraction == 0:
+                self._pause(retry_after_seconds(headers) or self.base_backoff)
+        elif self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+
+    def _on_rate_limited(self, headers: Mapping[str, str], attempt: int) -> None:
+        self.rate_limited_count += 1
+        self.concurrency = max(1, self.concurrency // 2)
+        delay = retry_after_seconds(headers)
+        if delay is None:
+            delay = self.base_backoff * 2 ** (attempt - 1)
+        logger.warning(
+            f"Embeddings rate limited (attempt {attempt}), "
+            f"concurrency -> {self.concurrency}, pausing {delay:.2f}s"
+        )
+        self._pause(delay)
+
+    def _pause(self, seconds: float) -> None:
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+class MicroBatcher(Generic[T, R]):
+    def __init__(
+        self,
+        flush: Callable[[list[T]], Awaitable[list[R]]],
+        max_wait_seconds: float,
+        max_batch_size: int,
+    ):
+        self.flush = flush
+        self.max_wait_seconds = max_wait_seconds
+        self.max_batch_size = max(1, max_batch_size)
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._pending: list[tuple[T, asyncio.Future[R]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size or self.max_wait_seconds <= 0:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_seconds, self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.batches += 1
+        self.items += len(pending)
+        self.largest_batch = max(self.largest_batch, len(pending))
+        task = asyncio.get_running_loop().create_task(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending: list[tuple[T, asyncio.Future[R]]]) -> None:
+        try:
+            results = await self.flush([item for item, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "largest_batch": self.largest_batch,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "max_batch_size": self.max_batch_size,
+        }
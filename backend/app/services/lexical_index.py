@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import io
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.,%$][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a about an and are as at be by can did do does for from has have how i in is it its of on or "
+    "please show tell that the their there this to was were what when where which who why with "
+    "you your me my our we give list describe explain summarise summarize".split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def query_terms(query: str) -> list[str]:
+    return list(dict.fromkeys(t for t in tokenize(query) if t not in STOPWORDS))
+
+
+@dataclass
+class LexicalResult:
+    hits: list[dict]
+    coverage: float
+    margin: float
+
+
+@dataclass
+class BM25Index:
+    ids: list[str]
+    metadata: list[dict]
+    vocabulary: dict[str, int]
+    offsets: np.ndarray
+    rows: np.ndarray
+    term_frequencies: np.ndarray
+    lengths: np.ndarray
+    version: str | None = None
+
+    @classmethod
+    def build(cls, ids: list[str], metadata: list[dict], texts: list[str], version: str | None = None) -> BM25Index:
+        postings: dict[str, list[tuple[int, int]]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[row] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, term in enumerate(terms):
+            offsets[i + 1] = offsets[i] + len(postings[term])
+        flat = [entry for term in terms for entry in postings[term]]
+        return cls(
+            ids=ids,
+            metadata=metadata,
+            vocabulary={term: i for i, term in enumerate(terms)},
+            offsets=offsets,
+            rows=np.asarray([row for row, _ in flat], dtype=np.int32),
+            term_frequencies=np.asarray([tf for _, tf in flat], dtype=np.float32),
+            lengths=lengths,
+            version=version,
+        )
+
+    def _postings(self, term: str) -> tuple[np.ndarray, np.ndarray] | None:
+        position = self.vocabulary.get(term)
+        if position is None:
+            return None
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.rows[start:end], self.term_frequencies[start:end]
+
+    def search(self, query: str, top_k: int, section_filter: str | None = None) -> LexicalResult:
+        terms = query_terms(query)
+        n = len(self.ids)
+        if not terms or n == 0:
+            return LexicalResult(hits=[], coverage=0.0, margin=0.0)
+
+        average_length = float(self.lengths.mean()) or 1.0
+        norms = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / average_length)
+        scores = np.zeros(n, dtype=np.float32)
+        matched = np.zeros(n, dtype=np.int32)
+        for term in terms:
+            postings = self._postings(term)
+            if postings is None:
+                continue
+            rows, tfs = postings
+            idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += idf * tfs * (BM25_K1 + 1) / (tfs + norms[rows])
+            matched[rows] += 1
+
+        if section_filter:
+            allowed = np.fromiter(
+                (m.get("section_heading") == section_filter for m in self.metadata), dtype=bool, count=n
+            )
+            scores[~allowed] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) == 0:
+            return LexicalResult(hits=[], coverage=0.0, margin=0.0)
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        best = order[:top_k]
+        top = float(scores[best[0]])
+        runner_up = float(scores[order[1]]) if len(order) > 1 else 0.0
+        hits = [
+            {
+                "id": self.ids[row],
+                "score": float(scores[row]) / top,
+                "bm25_score": float(scores[row]),
+                **self.metadata[row],
+            }
+            for row in best.tolist()
+        ]
+        return LexicalResult(
+            hits=hits,
+            coverage=int(matched[best[0]]) / len(terms),
+            margin=top / runner_up if runner_up > 0 else math.inf,
+        )
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        header = json.dumps(
+            {"ids": self.ids, "metadata": self.metadata, "terms": list(self.vocabulary), "version": self.version}
+        )
+        np.savez(
+            buffer,
+            header=np.frombuffer(header.encode(), dtype=np.uint8),
+            offsets=self.offsets,
+            rows=self.rows,
+            term_frequencies=self.term_frequencies,
+            lengths=self.lengths,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_file(cls, path: Path) -> BM25Index:
+        with np.load(path) as data:
+            header = json.loads(data["header"].tobytes())
+            return cls(
+                ids=header["ids"],
+                metadata=header["metadata"],
+                vocabulary={term: i for i, term in enumerate(header["terms"])},
+                offsets=data["offsets"],
+                rows=data["rows"],
+                term_frequencies=data["term_frequencies"],
+                lengths=data["lengths"],
+                version=header.get("version"),
+            )
+
+
+def reciprocal_rank_fusion(rankings: list[list[dict]], k: int, top_k: int) -> list[dict]:
+    fused: dict[str, float] = {}
+    merged: dict[str, dict] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking):
+            fused[hit["id"]] = fused.get(hit["id"], 0.0) + 1.0 / (k + rank + 1)
+            merged.setdefault(hit["id"], hit)
+    order = sorted(fused, key=lambda vid: fused[vid], reverse=True)[:top_k]
+    return [{**merged[vid], "rrf_score": fused[vid]} for vid in order]
+
+
+class LexicalIndexStore:
+    def __init__(self, root: str, max_loaded: int):
+        self.root = Path(root)
+        self.max_loaded = max_loaded
+        self.hits = 0
+        self.misses = 0
+        self._loaded: OrderedDict[str, BM25Index] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, document_id: str) -> Path:
+        return self.root / f"{document_id}.npz"
+
+    def write(
+        self,
+        document_id: str,
+        ids: list[str],
+        metadata: list[dict],
+        texts: list[str],
+        version: str | None = None,
+    ) -> None:
+        index = BM25Index.build(ids, metadata, texts, version)
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, staging = tempfile.mkstemp(dir=self.root, prefix=f".{document_id}-", suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            f.write(index.to_bytes())
+        with self._lock:
+            os.replace(staging, self._path(document_id))
+            self._loaded.pop(document_id, None)
+
+    def load(self, document_id: str) -> BM25Index | None:
+        with self._lock:
+            loaded = self._loaded.get(document_id)
+            if loaded is not None:
+                self._loaded.move_to_end(document_id)
+                return loaded
+        try:
+            index = BM25Index.from_file(self._path(document_id))
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._loaded[document_id] = index
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return index
+
+    def search(
+        self,
+        document_id: str,
+        query: str,
+        top_k: int,
+        section_filter: str | None = None,
+        version: str | None = None,
+    ) -> LexicalResult | None:
+        index = self.load(document_id)
+        if index is None or (version is not None and index.version != version):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return index.search(query, top_k, section_filter)
+
+    def delete(self, document_id: str) -> None:
+        with self._lock:
+            self._loaded.pop(document_id, None)
+        self._path(document_id).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._loaded.clear()
+        for path in self.root.glob("*.npz"):
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {
+            "loaded_documents": len(self._loaded),
+            "max_loaded_documents": self.max_loaded,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
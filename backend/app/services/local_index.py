@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from app.config import settings
+from app.services.vector_store import VectorStore, chunk_metadata, vector_id
+
+if TYPE_CHECKING:
+    from app.services.chunker import Chunk
+
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+VECTOR_BYTES = np.dtype(np.float32).itemsize
+
+
+@dataclass
+class DocumentIndex:
+    vectors: np.ndarray
+    ids: list[str]
+    metadata: list[dict]
+    section_rows: dict[str, np.ndarray]
+    version: str | None = None
+
+    def search(self, query: np.ndarray, top_k: int, section_filter: str | None = None) -> list[dict]:
+        if section_filter:
+            rows = self.section_rows.get(section_filter)
+            if rows is None:
+                return []
+            scores = self.vectors[rows] @ query
+        else:
+            rows = None
+            scores = self.vectors @ query
+
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        positions = rows[best] if rows is not None else best
+        return [
+            {"id": self.ids[p], "score": float(scores[b]), **self.metadata[p]}
+            for p, b in zip(positions.tolist(), best.tolist())
+        ]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _merge(
+    existing: DocumentIndex,
+    ids: list[str],
+    metadata: list[dict],
+    embeddings: np.ndarray | None,
+    removed_ids: list[str],
+) -> tuple[list[str], list[dict], np.ndarray]:
+    rows = {vid: row for row, vid in enumerate(existing.ids)}
+    merged_ids = list(existing.ids)
+    merged_metadata = list(existing.metadata)
+    merged_vectors = np.array(existing.vectors)
+    appended = []
+    if ids:
+        new_vectors = _normalize(embeddings)
+        for position, vid in enumerate(ids):
+            row = rows.get(vid)
+            if row is None:
+                merged_ids.append(vid)
+                merged_metadata.append(metadata[position])
+                appended.append(position)
+            else:
+                merged_metadata[row] = metadata[position]
+                merged_vectors[row] = new_vectors[position]
+        if appended:
+            merged_vectors = np.concatenate([merged_vectors, new_vectors[appended]])
+    if removed_ids:
+        removed = set(removed_ids)
+        keep = [row for row, vid in enumerate(merged_ids) if vid not in removed]
+        merged_ids = [merged_ids[row] for row in keep]
+        merged_metadata = [merged_metadata[row] for row in keep]
+        merged_vectors = merged_vectors[keep]
+    return merged_ids, merged_metadata, merged_vectors
+
+
+class LocalVectorIndex:
+    def __init__(self, root: str, max_loaded: int):
+        self.root = Path(root)
+        self.max_loaded = max_loaded
+        self.hits = 0
+        self.misses = 0
+        self._loaded: OrderedDict[str, DocumentIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _document_dir(self, document_id: str) -> Path:
+        return self.root / document_id
+
+    def write(
+        self,
+        document_id: str,
+        ids: list[str],
+        metadata: list[dict],
+        embeddings: np.ndarray,
+        version: str | None = None,
+    ) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=self.root, prefix=f".{document_id}-"))
+        try:
+            vectors = _normalize(embeddings)
+            vectors.tofile(staging / VECTORS_FILE)
+
+            sections: dict[str, list[int]] = {}
+            for row, meta in enumerate(metadata):
+                sections.setdefault(meta.get("section_heading", ""), []).append(row)
+            (staging / META_FILE).write_text(json.dumps({
+                "dimensions": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+                "ids": ids,
+                "metadata": metadata,
+                "sections": sections,
+                "version": version,
+            }))
+
+            target = self._document_dir(document_id)
+            with self._lock:
+                self._loaded.pop(document_id, None)
+                if target.exists():
+                    shutil.rmtree(target)
+                staging.rename(target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def upsert(self, document_id: str, ids: list[str], metadata: list[dict], embeddings: np.ndarray) -> None:
+        with self._write_lock:
+            existing = self.load(document_id)
+            if existing is None:
+                self.write(document_id, ids, metadata, embeddings)
+                return
+            self.write(document_id, *_merge(existing, ids, metadata, embeddings, []), existing.version)
+
+    def update(
+        self,
+        document_id: str,
+        version: str,
+        base_version: str | None,
+        ids: list[str],
+        metadata: list[dict],
+        embeddings: np.ndarray | None,
+        removed_ids: list[str],
+    ) -> None:
+        with self._write_lock:
+            if base_version is None:
+                self.write(document_id, ids, metadata, embeddings, version)
+                return
+            existing = self.load(document_id)
+            if existing is None or existing.version != base_version:
+                self.delete(document_id)
+                return
+            merged_ids, merged_metadata, merged_vectors = _merge(existing, ids, metadata, embeddings, removed_ids)
+            if not merged_ids:
+                self.delete(document_id)
+                return
+            self.write(document_id, merged_ids, merged_metadata, merged_vectors, version)
+
+    def remove(self, document_id: str, ids: list[str]) -> None:
+        with self._write_lock:
+            existing = self.load(document_id)
+            if existing is None:
+                return
+            removed = set(ids)
+            keep = [row for row, vid in enumerate(existing.ids) if vid not in removed]
+            if len(keep) == len(existing.ids):
+                return
+            if not keep:
+                self.delete(document_id)
+                return
+            self.write(
+                document_id,
+                [existing.ids[row] for row in keep],
+                [existing.metadata[row] for row in keep],
+                np.asarray(existing.vectors[keep]),
+                existing.version,
+            )
+
+    def load(self, document_id: str) -> DocumentIndex | None:
+        with self._lock:
+            loaded = self._loaded.get(document_id)
+            if loaded is not None:
+                self._loaded.move_to_end(document_id)
+                return loaded
+            index = self._read(document_id)
+            if index is None:
+                return None
+            self._loaded[document_id] = index
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return index
+
+    def _read(self, document_id: str) -> DocumentIndex | None:
+        directory = self._document_dir(document_id)
+        try:
+            meta = json.loads((directory / META_FILE).read_text())
+            if meta["dimensions"] != settings.embedding_dimensions or not meta["ids"]:
+                return None
+            shape = (len(meta["ids"]), meta["dimensions"])
+            if (directory / VECTORS_FILE).stat().st_size != shape[0] * shape[1] * VECTOR_BYTES:
+                return None
+            vectors = np.memmap(directory / VECTORS_FILE, dtype=np.float32, mode="r", shape=shape)
+        except FileNotFoundError:
+            return None
+        return DocumentIndex(
+            vectors=vectors,
+            ids=meta["ids"],
+            metadata=meta["metadata"],
+            section_rows={
+                heading: np.asarray(rows, dtype=np.intp) for heading, rows in meta["sections"].items()
+            },
+            version=meta.get("version"),
+        )
+
+    def search(
+        self,
+        document_id: str,
+        query: np.ndarray,
+        top_k: int,
+        section_filter: str | None = None,
+        version: str | None = None,
+    ) -> list[dict] | None:
+        index = self.load(document_id)
+        if index is None or (version is not None and index.version != version):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return index.search(_normalize(query), top_k, section_filter)
+
+    async def asearch(
+        self,
+        document_id: str,
+        query: np.ndarray,
+        top_k: int,
+        section_filter: str | None = None,
+        version: str | None = None,
+    ) -> list[dict] | None:
+        if document_id in self._loaded:
+            return self.search(document_id, query, top_k, section_filter, version)
+        return await asyncio.to_thread(self.search, document_id, query, top_k, section_filter, version)
+
+    def fetch(self, ids: list[str]) -> dict[str, dict]:
+        by_document: dict[str, list[str]] = {}
+        for vid in ids:
+            by_document.setdefault(vid.rsplit("#", 1)[0], []).append(vid)
+        found: dict[str, dict] = {}
+        for document_id, wanted in by_document.items():
+            index = self.load(document_id)
+            if index is None:
+                continue
+            rows = {vid: row for row, vid in enumerate(index.ids)}
+            for vid in wanted:
+                row = rows.get(vid)
+                if row is not None:
+                    found[vid] = {"id": vid, "values": np.array(index.vectors[row]), **index.metadata[row]}
+        return found
+
+    def delete(self, document_id: str) -> None:
+        with self._lock:
+            self._loaded.pop(document_id, None)
+            shutil.rmtree(self._document_dir(document_id), ignore_errors=True)
+
+    def delete_many(self, document_ids: list[str]) -> None:
+        with self._lock:
+            for document_id in document_ids:
+                self._loaded.pop(document_id, None)
+                shutil.rmtree(self._document_dir(document_id), ignore_errors=True)
+
+    def stats(self) -> dict:
+        return {
+            "loaded_documents": len(self._loaded),
+            "max_loaded_documents": self.max_loaded,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class LocalVectorStore(VectorStore):
+    def __init__(self, index: LocalVectorIndex):
+        self.index = index
+
+    async def upsert(self, document_id: str, chunks: list[Chunk], embeddings: np.ndarray) -> None:
+        await asyncio.to_thread(
+            self.index.upsert,
+            document_id,
+            [vector_id(document_id, c.chunk_index) for c in chunks],
+            [chunk_metadata(document_id, c) for c in chunks],
+            embeddings,
+        )
+
+    async def query(
+        self,
+        query_embedding: np.ndarray,
+        document_id: str,
+        top_k: int = 8,
+        section_filter: str | None = None,
+        version: str | None = None,
+    ) -> list[dict]:
+        return await self.index.asearch(document_id, query_embedding, top_k, section_filter) or []
+
+    async def delete_document(self, document_id: str) -> None:
+        await asyncio.to_thread(self.index.delete, document_id)
+
+    async def delete_ids(self, document_id: str, ids: list[str]) -> None:
+        await asyncio.to_thread(self.index.remove, document_id, ids)
+
+    async def delete_documents(self, document_ids: list[str]) -> None:
+        await asyncio.to_thread(self.index.delete_many, document_ids)
+
+    async def fetch(self, ids: list[str]) -> dict[str, dict]:
+        return await asyncio.to_thread(self.index.fetch, ids)
@@ -1,64 +1,228 @@
 from __future__ import annotations
 
-from app.dependencies import get_pinecone_index
+import asyncio
+import json
+import logging
+
+import numpy as np
+from pinecone.exceptions import NotFoundException
+
+from app.config import settings
+from app.dependencies import get_local_index, get_pinecone_index
 from app.services.chunker import Chunk
+from app.services.vector_store import VectorStore, chunk_metadata, vector_id
 
+logger = logging.getLogger(__name__)
+
+JSON_BYTES_PER_FLOAT = 20
+DELETE_FILTER_BATCH_SIZE = 500
 
-def upsert_chunks(document_id: str, chunks: list[Chunk], embeddings: list[list[float]]) -> None:
-    index = get_pinecone_index()
-    batch_size = 100
-
-    vectors = []
-    for chunk, embedding in zip(chunks, embeddings):
-        vector_id = f"{document_id}#{chunk.chunk_index}"
-        metadata = {
-            "document_id": document_id,
-            "chunk_index": chunk.chunk_index,
-            "section_heading": chunk.section_heading,
-            "section_level": chunk.section_level,
-            "parent_section": chunk.parent_section,
-            "content_type": chunk.content_type,
-            "page_start": chunk.page_start,
-            "page_end": chunk.page_end,
-            "chunk_text": chunk.text,
-            "token_count": chunk.token_count,
-        }
-        vectors.append({"id": vector_id, "values": embedding, "metadata": metadata})
 
-    for i in range(0, len(vectors), batch_size):
-        batch = vectors[i : i + batch_size]
-        index.upsert(vectors=batch)
+def _estimate_vector_bytes(vector_id: str, dimensions: int, metadata: dict) -> int:
+    return len(vector_id) + dimensions * JSON_BYTES_PER_FLOAT + len(json.dumps(metadata))
 
 
-def query_vectors(
-    query_embedding: list[float],
+def _pack_upsert_batches(
     document_id: str,
-    top_k: int = 8,
-    section_filter: str | None = None,
-) -> list[dict]:
-    index = get_pinecone_index()
-
-    filter_dict: dict = {"document_id": {"$eq": document_id}}
-    if section_filter:
-        filter_dict["section_heading"] = {"$eq": section_filter}
-
-    results = index.query(
-        vector=query_embedding,
-        top_k=top_k,
-        include_metadata=True,
-        filter=filter_dict,
-    )
-
-    return [
+    chunks: list[Chunk],
+    dimensions: int,
+    max_count: int,
+    max_bytes: int,
+) -> list[tuple[int, int]]:
+    batches: list[tuple[int, int]] = []
+    start = 0
+    batch_bytes = 0
+    for i, chunk in enumerate(chunks):
+        size = _estimate_vector_bytes(
+            vector_id(document_id, chunk.chunk_index), dimensions, chunk_metadata(document_id, chunk)
+        )
+        if i > start and (batch_bytes + size > max_bytes or i - start >= max_count):
+            batches.append((start, i))
+            start = i
+            batch_bytes = 0
+        batch_bytes += size
+    if start < len(chunks):
+        batches.append((start, len(chunks)))
+    return batches
+
+
+def document_namespace(document_id: str) -> str:
+    return document_id if settings.pinecone_namespace_per_document else ""
+
+
+def _upsert_batch(index, document_id: str, chunks: list[Chunk], embeddings: np.ndarray) -> None:
+    values = embeddings.astype(np.float32, copy=False).tolist()
+    vectors = [
         {
-            "id": match["id"],
-            "score": match["score"],
-            **match["metadata"],
+            "id": vector_id(document_id, chunk.chunk_index),
+            "values": vector,
+            "metadata": chunk_metadata(document_id, chunk),
         }
-        for match in results["matches"]
+        for chunk, vector in zip(chunks, values)
     ]
+    index.upsert(vectors=vectors, namespace=document_namespace(document_id))
+
+
+def _fetched_vectors(response) -> dict[str, dict]:
+    return {
+        vid: {
+            "id": vid,
+            "values": np.asarray(vector.values, dtype=np.float32),
+            **(vector.metadata or {}),
+        }
+        for vid, vector in response.vectors.items()
+    }
+
+
+class PineconeVectorStore(VectorStore):
+    async def upsert(self, document_id: str, chunks: list[Chunk], embeddings: np.ndarray) -> None:
+        index = get_pinecone_index()
+        batches = _pack_upsert_batches(
+            document_id,
+            chunks,
+            embeddings.shape[1] if len(embeddings) else 0,
+            max_count=settings.pinecone_upsert_batch_size,
+            max_bytes=settings.pinecone_upsert_max_bytes,
+        )
+        semaphore = asyncio.Semaphore(settings.pinecone_upsert_concurrency)
+
+        async def upsert_with_retries(start: int, end: int) -> None:
+            async with semaphore:
+                for attempt in range(settings.pinecone_upsert_max_retries + 1):
+                    try:
+                        await asyncio.to_thread(
+                            _upsert_batch, index, document_id, chunks[start:end], embeddings[start:end]
+                        )
+                        return
+                    except Exception as e:
+                        if attempt == settings.pinecone_upsert_max_retries:
+                            raise
+                        delay = 0.5 * 2**attempt
+                        logger.warning(
+                            f"Pinecone upsert of vectors {start}-{end} for document {document_id} "
+                            f"failed (attempt {attempt + 1}), retrying in {delay:.1f}s: {e}"
+                        )
+                        await asyncio.sleep(delay)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                for start, end in batches:
+                    group.create_task(upsert_with_retries(start, end))
+        except BaseExceptionGroup as eg:
+            raise eg.exceptions[0]
+
+    async def refresh_local_copy(
+        self,
+        document_id: str,
+        version: str,
+        base_version: str | None,
+        chunks: list[Chunk],
+        embeddings: np.ndarray | None,
+        removed_ids: list[str],
+    ) -> None:
+        if not settings.local_index_enabled:
+            return
+        await asyncio.to_thread(
+            get_local_index().update,
+            document_id,
+            version,
+            base_version,
+            [vector_id(document_id, c.chunk_index) for c in chunks],
+            [chunk_metadata(document_id, c) for c in chunks],
+            embeddings,
+            removed_ids,
+        )
+
+    async def query(
+        self,
+        query_embedding: np.ndarray,
+        document_id: str,
+        top_k: int = 8,
+        section_filter: str | None = None,
+        version: str | None = None,
+    ) -> list[dict]:
+        if settings.local_index_enabled and version is not None:
+            local = await get_local_index().asearch(document_id, query_embedding, top_k, section_filter, version)
+            if local is not None:
+                return local
+
+        filter_dict: dict = {}
+        if not settings.pinecone_namespace_per_document:
+            filter_dict["document_id"] = {"$eq": document_id}
+        if section_filter:
+            filter_dict["section_heading"] = {"$eq": section_filter}
+
+        results = await asyncio.to_thread(
+            get_pinecone_index().query,
+            vector=np.asarray(query_embedding, dtype=np.float32).tolist(),
+            top_k=top_k,
+            include_metadata=True,
+            filter=filter_dict or None,
+            namespace=document_namespace(document_id),
+        )
+
+        return [
+            {
+                "id": match["id"],
+                "score": match["score"],
+                **match["metadata"],
+            }
+            for match in results["matches"]
+        ]
+
+    async def delete_document(self, document_id: str) -> None:
+        await asyncio.to_thread(get_local_index().delete, document_id)
+        index = get_pinecone_index()
+        if not settings.pinecone_namespace_per_document:
+            await asyncio.to_thread(index.delete, filter={"document_id": {"$eq": document_id}})
+            return
+        try:
+            await asyncio.to_thread(index.delete, delete_all=True, namespace=document_id)
+        except NotFoundException:
+            pass
+
+    async def delete_documents(self, document_ids: list[str]) -> None:
+        await asyncio.to_thread(get_local_index().delete_many, document_ids)
+        index = get_pinecone_index()
+        semaphore = asyncio.Semaphore(settings.pinecone_delete_concurrency)
+
+        async def delete_namespace(document_id: str) -> None:
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(index.delete, delete_all=True, namespace=document_id)
+                except NotFoundException:
+                    pass
+
+        async def delete_by_filter(batch: list[str]) -> None:
+            async with semaphore:
+                await asyncio.to_thread(index.delete, filter={"document_id": {"$in": batch}})
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                if settings.pinecone_namespace_per_document:
+                    for document_id in document_ids:
+                        group.create_task(delete_namespace(document_id))
+                else:
+                    for i in range(0, len(document_ids), DELETE_FILTER_BATCH_SIZE):
+                        group.create_task(delete_by_filter(document_ids[i : i + DELETE_FILTER_BATCH_SIZE]))
+        except BaseExceptionGroup as eg:
+            raise eg.exceptions[0]
 
+    async def delete_ids(self, document_id: str, ids: list[str]) -> None:
+        index = get_pinecone_index()
+        for i in range(0, len(ids), 1000):
+            await asyncio.to_thread(index.delete, ids=ids[i : i + 1000], namespace=document_namespace(document_id))
 
-def delete_document_vectors(document_id: str) -> None:
-    index = get_pinecone_index()
-    index.delete(filter={"document_id": {"$eq": document_id}})
+    async def fetch(self, ids: list[str]) -> dict[str, dict]:
+        if not ids:
+            return {}
+        index = get_pinecone_index()
+        by_namespace: dict[str, list[str]] = {}
+        for vid in ids:
+            by_namespace.setdefault(document_namespace(vid.rsplit("#", 1)[0]), []).append(vid)
+        found: dict[str, dict] = {}
+        for namespace, wanted in by_namespace.items():
+            for i in range(0, len(wanted), 1000):
+                response = await asyncio.to_thread(index.fetch, ids=wanted[i : i + 1000], namespace=namespace)
+                found.update(_fetched_vectors(response))
+        return found
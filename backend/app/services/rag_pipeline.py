@@ -1,57 +1,109 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Awaitable, Callable
 
 from app.config import settings
-from app.dependencies import get_openai_client
+from app.dependencies import get_index_version_cache, get_lexical_index, get_openai_client
 from app.models.schemas import Citation
 from app.prompts.rag import RAG_PROMPT, RAG_PROMPT_WITH_SECTION
 from app.prompts.system import SYSTEM_PROMPT
-from app.services.embedder import embed_query
-from app.services.pinecone_store import query_vectors
-
-
-async def retrieve_context(
+from app.services.answer_cache import get_answer_cache
+from app.services.context_packer import pack_context
+from app.services.embedder import cached_query_embedding, embed_query
+from app.services.lexical_index import reciprocal_rank_fusion
+from app.services.retrieval_cache import get_retrieval_cache
+from app.services.vector_store import query_vectors
+from app.services.supabase_client import get_chunk_texts, get_index_version
+
+
+async def current_index_version(document_id: str) -> str | None:
+    cache = get_index_version_cache()
+    version = cache.get(document_id)
+    if version is None:
+        version = await get_index_version(document_id)
+        if version is not None:
+            cache.set(document_id, version)
+    return version
+
+
+async def search_chunks(
     query: str,
     document_id: str,
     section_filter: str | None = None,
-) -> tuple[str, list[Citation]]:
+) -> list[dict]:
+    top_k = settings.retrieval_top_k
+    hybrid = settings.retrieval_mode == "hybrid"
+    version = await current_index_version(document_id) if hybrid or settings.local_index_enabled else None
+    lexical = None
+    if hybrid and version is not None:
+        lexical = await asyncio.to_thread(
+            get_lexical_index().search, document_id, query, top_k, section_filter, version
+        )
+        if (
+            lexical is not None
+            and settings.lexical_fast_path_enabled
+            and lexical.coverage == 1.0
+            and lexical.margin >= settings.lexical_fast_path_min_margin
+        ):
+            return lexical.hits
+
     query_embedding = await embed_query(query)
-    results = query_vectors(
+    results = await query_vectors(
         query_embedding=query_embedding,
         document_id=document_id,
-        top_k=settings.retrieval_top_k,
+        top_k=top_k,
         section_filter=section_filter,
+        version=version,
     )
+    if lexical is not None and lexical.hits:
+        return reciprocal_rank_fusion([results, lexical.hits], settings.rrf_k, top_k)
+    return results
+
+
+async def retrieve_context(
+    query: str,
+    document_id: str,
+    section_filter: str | None = None,
+) -> tuple[str, list[Citation]]:
+    cache = get_retrieval_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = await cache.key(document_id, query, section_filter, settings.retrieval_top_k)
+        if cache_key is not None:
+            cached = await cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+    results = await search_chunks(query, document_id, section_filter)
+    chunk_texts = await get_chunk_texts([r["id"] for r in results if "chunk_text" not in r])
+
+    passages = pack_context(results, chunk_texts, settings.context_token_budget)
 
     context_parts = []
     citations = []
     seen_pages = set()
 
-    for r in results:
-        chunk_text = r.get("chunk_text", "")
-        page_start = r.get("page_start", 0)
-        page_end = r.get("page_end", 0)
-        section = r.get("section_heading", "")
-        score = r.get("score", 0.0)
-
+    for p in passages:
         context_parts.append(
-            f"[Section: {section} | Pages {page_start}-{page_end}]\n{chunk_text}"
+            f"[Section: {p.section_heading} | Pages {p.page_start}-{p.page_end}]\n{p.text}"
         )
 
-        page_key = (page_start, page_end, section)
+        page_key = (p.page_start, p.page_end, p.section_heading)
         if page_key not in seen_pages:
             seen_pages.add(page_key)
             citations.append(Citation(
-                page_start=page_start,
-                page_end=page_end,
-                section_heading=section,
-                relevance_score=round(score, 3),
-                chunk_text=chunk_text[:200],
+                page_start=p.page_start,
+                page_end=p.page_end,
+                section_heading=p.section_heading,
+                relevance_score=round(p.score, 3),
+                chunk_text=p.text[:200],
             ))
 
     context = "\n\n---\n\n".join(context_parts)
+    if cache_key is not None:
+        await cache.set(cache_key, (context, citations))
     return context, citations
 
 
@@ -59,8 +111,27 @@ async def stream_rag_response(
     query: str,
     document_id: str,
     section_filter: str | None = None,
+    prefetch: Callable[[], Awaitable[tuple[str, list[Citation]] | None]] | None = None,
 ) -> AsyncGenerator[tuple[str, str, list[Citation] | None], None]:
-    context, citations = await retrieve_context(query, document_id, section_filter)
+    answer_cache = get_answer_cache() if settings.answer_cache_enabled else None
+    if answer_cache is not None:
+        generation = answer_cache.generation(document_id)
+        shared = get_retrieval_cache()
+        version = await shared.document_version(document_id) if shared is not None else None
+        if shared is not None and version is None:
+            answer_cache = None
+
+    retrieved = await prefetch() if prefetch is not None else None
+    context, citations = retrieved or await retrieve_context(query, document_id, section_filter)
+
+    query_embedding = cached_query_embedding(query) if answer_cache is not None else None
+    if query_embedding is not None:
+        cached = answer_cache.lookup(document_id, query, query_embedding, section_filter, version)
+        if cached is not None:
+            yield ("citations", json.dumps([c.model_dump() for c in cached.citations]), None)
+            yield ("token", cached.answer, None)
+            yield ("done", "", cached.citations)
+            return
 
     if section_filter:
         user_prompt = RAG_PROMPT_WITH_SECTION.format(
@@ -82,11 +153,17 @@ async def stream_rag_response(
 
     yield ("citations", json.dumps([c.model_dump() for c in citations]), None)
 
+    answer_parts = []
     async for chunk in stream:
         delta = chunk.choices[0].delta
         if delta.content:
+            answer_parts.append(delta.content)
             yield ("token", delta.content, None)
 
+    if query_embedding is not None and answer_parts:
+        answer_cache.store(
+            document_id, query, query_embedding, section_filter, "".join(answer_parts), citations, generation, version
+        )
     yield ("done", "", citations)
 
 
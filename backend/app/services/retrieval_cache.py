@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from app.config import settings
+from app.models.schemas import Citation
+from app.services.embedder import normalize_query
+from app.services.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+RetrievalResult = tuple[str, list[Citation]]
+
+
+class RetrievalCache(ABC):
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    async def document_version(self, document_id: str) -> int | None: ...
+
+    @abstractmethod
+    async def invalidate_document(self, document_id: str) -> None: ...
+
+    @abstractmethod
+    async def _get(self, key: str) -> RetrievalResult | None: ...
+
+    @abstractmethod
+    async def _set(self, key: str, value: RetrievalResult) -> None: ...
+
+    async def key(self, document_id: str, query: str, section_filter: str | None, top_k: int) -> str | None:
+        version = await self.document_version(document_id)
+        if version is None:
+            return None
+        raw = "\0".join([document_id, normalize_query(query), section_filter or "", str(top_k), str(version)])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def get(self, key: str) -> RetrievalResult | None:
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: RetrievalResult) -> None:
+        await self._set(key, value)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": settings.retrieval_cache_backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class InProcessRetrievalCache(RetrievalCache):
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        super().__init__()
+        self.entries: TTLCache[str, RetrievalResult] = TTLCache(maxsize, ttl_seconds)
+        self.versions: dict[str, int] = {}
+
+    async def document_version(self, document_id: str) -> int | None:
+        return self.versions.get(document_id, 0)
+
+    async def invalidate_document(self, document_id: str) -> None:
+        self.versions[document_id] = self.versions.get(document_id, 0) + 1
+
+    async def _get(self, key: str) -> RetrievalResult | None:
+        return self.entries.get(key)
+
+    async def _set(self, key: str, value: RetrievalResult) -> None:
+        self.entries.set(key, value)
+
+    def stats(self) -> dict:
+        return {**self.entries.stats(), **super().stats()}
+
+
+class RedisRetrievalCache(RetrievalCache):
+    def __init__(self, client, ttl_seconds: float, prefix: str = "retrieval"):
+        super().__init__()
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.errors = 0
+
+    def _version_key(self, document_id: str) -> str:
+        return f"{self.prefix}:version:{document_id}"
+
+    async def document_version(self, document_id: str) -> int | None:
+        try:
+            return int(await self.client.get(self._version_key(document_id)) or 0)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Retrieval cache version lookup failed, bypassing cache: {e}")
+            return None
+
+    async def invalidate_document(self, document_id: str) -> None:
+        try:
+            await self.client.incr(self._version_key(document_id))
+        except Exception as e:
+            self.errors += 1
+            logger.error(
+                f"Failed to invalidate cached retrievals for document {document_id}; "
+                f"stale entries expire within {self.ttl_seconds:.0f}s: {e}"
+            )
+
+    async def _get(self, key: str) -> RetrievalResult | None:
+        try:
+            raw = await self.client.get(f"{self.prefix}:entry:{key}")
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Retrieval cache read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return payload["context"], [Citation(**c) for c in payload["citations"]]
+
+    async def _set(self, key: str, value: RetrievalResult) -> None:
+        context, citations = value
+        payload = json.dumps({"context": context, "citations": [c.model_dump() for c in citations]})
+        try:
+            await self.client.set(f"{self.prefix}:entry:{key}", payload, ex=max(1, int(self.ttl_seconds)))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Retrieval cache write failed: {e}")
+
+    def stats(self) -> dict:
+        return {**super().stats(), "ttl_seconds": self.ttl_seconds, "errors": self.errors}
+
+
+@lru_cache
+def get_retrieval_cache() -> RetrievalCache | None:
+    if settings.retrieval_cache_backend == "none":
+        return None
+    if settings.retrieval_cache_backend == "memory":
+        return InProcessRetrievalCache(settings.retrieval_cache_size, settings.retrieval_cache_ttl_seconds)
+    if settings.retrieval_cache_backend == "redis":
+        from redis.asyncio import Redis
+
+        return RedisRetrievalCache(
+            Redis.from_url(settings.retrieval_cache_redis_url),
+            settings.retrieval_cache_ttl_seconds,
+        )
+    raise ValueError(f"Unknown retrieval cache backend: {settings.retrieval_cache_backend}")
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from functools import lru_cache
+
+from app.models.schemas import Citation
+from app.services.rag_pipeline import retrieve_context
+
+logger = logging.getLogger(__name__)
+
+
+class SpeculationStats:
+    def __init__(self):
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+        self.failed = 0
+        self.saved_ms_total = 0.0
+        self.last_saved_ms = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "used": self.used,
+            "discarded": self.discarded,
+            "failed": self.failed,
+            "saved_ms_total": round(self.saved_ms_total, 1),
+            "saved_ms_mean": round(self.saved_ms_total / self.used, 1) if self.used else 0.0,
+            "last_saved_ms": round(self.last_saved_ms, 1),
+        }
+
+
+@lru_cache
+def get_speculation_stats() -> SpeculationStats:
+    return SpeculationStats()
+
+
+class SpeculativeRetrieval:
+    def __init__(self, query: str, document_id: str):
+        self.query = query
+        self.document_id = document_id
+        self.started_at = time.perf_counter()
+        self.finished_at: float | None = None
+        self.consumed = False
+        self.stats = get_speculation_stats()
+        self.stats.started += 1
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self) -> tuple[str, list[Citation]]:
+        result = await retrieve_context(self.query, self.document_id)
+        self.finished_at = time.perf_counter()
+        return result
+
+    async def result(self) -> tuple[str, list[Citation]] | None:
+        self.consumed = True
+        waited_from = time.perf_counter()
+        try:
+            result = await self.task
+        except Exception as e:
+            self.stats.failed += 1
+            logger.warning(f"Speculative retrieval for document {self.document_id} failed: {e}")
+            return None
+        waited_ms = (time.perf_counter() - waited_from) * 1000
+        retrieval_ms = (self.finished_at - self.started_at) * 1000
+        saved_ms = retrieval_ms - waited_ms
+        self.stats.used += 1
+        self.stats.saved_ms_total += saved_ms
+        self.stats.last_saved_ms = saved_ms
+        logger.info(
+            f"Speculative retrieval for document {self.document_id}: "
+            f"retrieval {retrieval_ms:.0f}ms, waited {waited_ms:.0f}ms, saved {saved_ms:.0f}ms before first token"
+        )
+        return result
+
+    def discard(self) -> None:
+        self.task.cancel()
+        self.stats.discarded += 1
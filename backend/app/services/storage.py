@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+LIST_PAGE_SIZE = 1000
+DELETE_BATCH_SIZE = 1000
+
+
+def _storage_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=f"{settings.supabase_url}/storage/v1",
+        headers={
+            "Authorization": f"Bearer {settings.supabase_key}",
+            "apikey": settings.supabase_key,
+        },
+        timeout=30.0,
+    )
+
+
+async def _list_page(http: httpx.AsyncClient, prefix: str, offset: int) -> list[dict]:
+    response = await http.post(
+        f"/object/list/{settings.supabase_storage_bucket}",
+        json={
+            "prefix": prefix,
+            "limit": LIST_PAGE_SIZE,
+            "offset": offset,
+            "sortBy": {"column": "name", "order": "asc"},
+        },
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def list_objects(http: httpx.AsyncClient, prefix: str, semaphore: asyncio.Semaphore) -> list[str]:
+    paths: list[str] = []
+    folders: list[str] = []
+    offset = 0
+    while True:
+        async with semaphore:
+            entries = await _list_page(http, prefix, offset)
+        for entry in entries:
+            path = f"{prefix}/{entry['name']}" if prefix else entry["name"]
+            if entry.get("id") is None:
+                folders.append(path)
+            else:
+                paths.append(path)
+        if len(entries) < LIST_PAGE_SIZE:
+            break
+        offset += LIST_PAGE_SIZE
+
+    nested: list[list[str]] = [[] for _ in folders]
+
+    async def list_folder(position: int, folder: str) -> None:
+        nested[position] = await list_objects(http, folder, semaphore)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            for position, folder in enumerate(folders):
+                group.create_task(list_folder(position, folder))
+    except BaseExceptionGroup as eg:
+        raise eg.exceptions[0]
+
+    for folder_paths in nested:
+        paths.extend(folder_paths)
+    return paths
+
+
+async def delete_objects(http: httpx.AsyncClient, paths: list[str], semaphore: asyncio.Semaphore) -> None:
+    async def delete_batch(batch: list[str]) -> None:
+        async with semaphore:
+            response = await http.request(
+                "DELETE",
+                f"/object/{settings.supabase_storage_bucket}",
+                json={"prefixes": batch},
+            )
+            response.raise_for_status()
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            for i in range(0, len(paths), DELETE_BATCH_SIZE):
+                group.create_task(delete_batch(paths[i : i + DELETE_BATCH_SIZE]))
+    except BaseExceptionGroup as eg:
+        raise eg.exceptions[0]
+
+
+async def delete_prefix(prefix: str = "") -> int:
+    semaphore = asyncio.Semaphore(settings.storage_concurrency)
+    try:
+        async with _storage_client() as http:
+            paths = await list_objects(http, prefix.strip("/"), semaphore)
+            await delete_objects(http, paths, semaphore)
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to clear storage under '{prefix}': {e}")
+        return 0
+    logger.info(f"Deleted {len(paths)} storage objects under '{prefix}'")
+    return len(paths)
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import functools
 import json
-from typing import Any
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from typing import Any, ParamSpec, TypeVar
 
-from app.dependencies import get_supabase_client
+from app.dependencies import get_supabase_client, get_supabase_executor
 from app.models.schemas import (
     Citation,
     ClarificationChip,
@@ -14,7 +20,27 @@ from app.models.schemas import (
     ThreadId,
 )
 
+P = ParamSpec("P")
+R = TypeVar("R")
 
+DOCUMENT_SUMMARY_COLUMNS = "id, filename, blob_url, status, page_count, created_at"
+THREAD_SUMMARY_COLUMNS = "id, title, document_id, created_at"
+THREAD_MESSAGE_COLUMNS = (
+    "id, thread_id, role, content, citations, clarification_chips, message_type, feedback, created_at"
+)
+
+
+def _offload(func: Callable[P, R]) -> Callable[P, Awaitable[R]]:
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(get_supabase_executor(), call)
+
+    return wrapper
+
+
+@_offload
 def create_document(filename: str, blob_url: str | None = None) -> dict:
     client = get_supabase_client()
     result = client.table("documents").insert({
@@ -25,11 +51,13 @@ def create_document(filename: str, blob_url: str | None = None) -> dict:
     return result.data[0]
 
 
+@_offload
 def update_document_status(
     document_id: str,
     status: DocumentStatus,
     page_count: int | None = None,
     sections: list[dict] | None = None,
+    index_version: str | None = None,
 ) -> None:
     client = get_supabase_client()
     update: dict[str, Any] = {"status": status.value}
@@ -37,21 +65,58 @@ def update_document_status(
         update["page_count"] = page_count
     if sections is not None:
         update["sections"] = sections
+    if index_version is not None:
+        update["index_version"] = index_version
     client.table("documents").update(update).eq("id", document_id).execute()
 
 
+@_offload
+def rename_document(document_id: str, filename: str) -> None:
+    client = get_supabase_client()
+    client.table("documents").update({"filename": filename}).eq("id", document_id).execute()
+
+
+@_offload
 def get_document(document_id: str) -> dict | None:
     client = get_supabase_client()
     result = client.table("documents").select("*").eq("id", document_id).execute()
     return result.data[0] if result.data else None
 
 
-def list_documents() -> list[dict]:
+@_offload
+def get_index_version(document_id: str) -> str | None:
     client = get_supabase_client()
-    result = client.table("documents").select("*").execute()
-    return result.data
+    result = client.table("documents").select("index_version").eq("id", document_id).execute()
+    return result.data[0]["index_version"] if result.data else None
+
 
+def _before_cursor(query, before: str | None, before_id: str | None):
+    if before is None:
+        return query
+    if before_id is None:
+        return query.lt("created_at", before)
+    return query.or_(f'created_at.lt."{before}",and(created_at.eq."{before}",id.lt.{before_id})')
 
+
+def _newest_first(query, before: str | None, before_id: str | None, limit: int | None) -> list[dict]:
+    query = _before_cursor(query, before, before_id).order("created_at", desc=True).order("id", desc=True)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.execute().data
+
+
+@_offload
+def list_documents(
+    before: str | None = None,
+    before_id: str | None = None,
+    limit: int | None = None,
+    columns: str = "*",
+) -> list[dict]:
+    client = get_supabase_client()
+    return _newest_first(client.table("documents").select(columns), before, before_id, limit)
+
+
+@_offload
 def create_sections(document_id: str, sections: list[dict]) -> list[dict]:
     client = get_supabase_client()
     rows = [
@@ -69,6 +134,69 @@ def create_sections(document_id: str, sections: list[dict]) -> list[dict]:
     return result.data
 
 
+@_offload
+def delete_sections(document_id: str) -> None:
+    client = get_supabase_client()
+    client.table("document_sections").delete().eq("document_id", document_id).execute()
+
+
+@_offload
+def create_chunks(document_id: str, chunks: list[dict]) -> None:
+    client = get_supabase_client()
+    rows = [
+        {
+            "id": f"{document_id}#{c['chunk_index']}",
+            "document_id": document_id,
+            "chunk_index": c["chunk_index"],
+            "chunk_text": c["chunk_text"],
+            "content_hash": c.get("content_hash"),
+        }
+        for c in chunks
+    ]
+    for i in range(0, len(rows), 500):
+        client.table("document_chunks").upsert(rows[i : i + 500]).execute()
+
+
+@_offload
+def get_chunk_hashes(document_id: str) -> dict[int, str | None]:
+    client = get_supabase_client()
+    result = (
+        client.table("document_chunks")
+        .select("chunk_index, content_hash")
+        .eq("document_id", document_id)
+        .execute()
+    )
+    return {row["chunk_index"]: row["content_hash"] for row in result.data}
+
+
+@_offload
+def delete_chunks(document_id: str, chunk_indexes: list[int]) -> None:
+    client = get_supabase_client()
+    for i in range(0, len(chunk_indexes), 500):
+        (
+            client.table("document_chunks")
+            .delete()
+            .eq("document_id", document_id)
+            .in_("chunk_index", chunk_indexes[i : i + 500])
+            .execute()
+        )
+
+
+@_offload
+def get_chunk_texts(chunk_ids: list[str]) -> dict[str, str]:
+    if not chunk_ids:
+        return {}
+    client = get_supabase_client()
+    result = (
+        client.table("document_chunks")
+        .select("id, chunk_text")
+        .in_("id", chunk_ids)
+        .execute()
+    )
+    return {row["id"]: row["chunk_text"] for row in result.data}
+
+
+@_offload
 def get_sections(document_id: str) -> list[dict]:
     client = get_supabase_client()
     result = (
@@ -81,40 +209,57 @@ def get_sections(document_id: str) -> list[dict]:
     return result.data
 
 
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def thread_row(document_id: str | None = None, title: str | None = None) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "document_id": document_id or None,
+        "title": title or None,
+        "created_at": _now(),
+    }
+
+
+@_offload
 def create_thread(document_id: str | None = None, title: str | None = None) -> dict:
     client = get_supabase_client()
-    data: dict[str, Any] = {}
-    if document_id:
-        data["document_id"] = document_id
-    if title:
-        data["title"] = title
-    result = client.table("threads").insert(data).execute()
+    result = client.table("threads").insert(thread_row(document_id, title)).execute()
     return result.data[0]
 
 
+@_offload
 def get_thread(thread_id: str) -> dict | None:
     client = get_supabase_client()
     result = client.table("threads").select("*").eq("id", thread_id).execute()
     return result.data[0] if result.data else None
 
 
-def list_threads() -> list[dict]:
+@_offload
+def list_threads(
+    before: str | None = None,
+    before_id: str | None = None,
+    limit: int | None = None,
+    columns: str = "*",
+) -> list[dict]:
     client = get_supabase_client()
-    result = client.table("threads").select("*").order("created_at", desc=True).execute()
-    return result.data
+    return _newest_first(client.table("threads").select(columns), before, before_id, limit)
 
 
+@_offload
 def update_thread_title(thread_id: str, title: str) -> None:
     client = get_supabase_client()
     client.table("threads").update({"title": title}).eq("id", thread_id).execute()
 
 
+@_offload
 def delete_thread(thread_id: str) -> None:
     client = get_supabase_client()
     client.table("threads").delete().eq("id", thread_id).execute()
 
 
-def create_message(
+def message_row(
     thread_id: str,
     role: MessageRole,
     content: str,
@@ -122,41 +267,64 @@ def create_message(
     citations: list[Citation] | None = None,
     clarification_chips: list[ClarificationChip] | None = None,
 ) -> dict:
-    client = get_supabase_client()
-    data: dict[str, Any] = {
+    return {
+        "id": str(uuid.uuid4()),
         "thread_id": thread_id,
         "role": role.value,
         "content": content,
+        "message_type": message_type.value if message_type else None,
+        "citations": [c.model_dump() for c in citations] if citations else None,
+        "clarification_chips": [c.model_dump() for c in clarification_chips] if clarification_chips else None,
+        "created_at": _now(),
     }
-    if message_type:
-        data["message_type"] = message_type.value
-    if citations:
-        data["citations"] = [c.model_dump() for c in citations]
-    if clarification_chips:
-        data["clarification_chips"] = [c.model_dump() for c in clarification_chips]
 
+
+@_offload
+def create_message(
+    thread_id: str,
+    role: MessageRole,
+    content: str,
+    message_type: MessageType | None = None,
+    citations: list[Citation] | None = None,
+    clarification_chips: list[ClarificationChip] | None = None,
+) -> dict:
+    client = get_supabase_client()
+    data = message_row(thread_id, role, content, message_type, citations, clarification_chips)
     result = client.table("messages").insert(data).execute()
     return result.data[0]
 
 
+@_offload
+def insert_rows(table: str, rows: list[dict]) -> None:
+    client = get_supabase_client()
+    client.table(table).insert(rows).execute()
+
+
+@_offload
 def get_message(message_id: str) -> dict | None:
     client = get_supabase_client()
     result = client.table("messages").select("*").eq("id", message_id).execute()
     return result.data[0] if result.data else None
 
 
-def get_messages(thread_id: str) -> list[dict]:
+@_offload
+def list_thread_messages(
+    thread_id: str,
+    before: str | None = None,
+    before_id: str | None = None,
+    limit: int | None = None,
+    columns: str = THREAD_MESSAGE_COLUMNS,
+) -> list[dict]:
     client = get_supabase_client()
-    result = (
-        client.table("messages")
-        .select("*")
-        .eq("thread_id", thread_id)
-        .order("created_at", desc=False)
-        .execute()
-    )
-    return result.data
+    query = client.table("thread_messages").select(columns).eq("thread_id", thread_id)
+    query = _before_cursor(query, before, before_id)
+    if limit is None:
+        return query.order("created_at", desc=False).order("id", desc=False).execute().data
+    result = query.order("created_at", desc=True).order("id", desc=True).limit(limit).execute()
+    return result.data[::-1]
 
 
+@_offload
 def upsert_feedback(message_id: str, signal: int) -> None:
     client = get_supabase_client()
     client.table("message_feedback").upsert({
@@ -165,36 +333,20 @@ def upsert_feedback(message_id: str, signal: int) -> None:
     }).execute()
 
 
+@_offload
 def delete_feedback(message_id: str) -> None:
     client = get_supabase_client()
     client.table("message_feedback").delete().eq("message_id", message_id).execute()
 
 
-def get_feedback_for_messages(message_ids: list[str]) -> dict[str, int]:
-    if not message_ids:
-        return {}
+@_offload
+def delete_document(document_id: str) -> None:
     client = get_supabase_client()
-    result = (
-        client.table("message_feedback")
-        .select("message_id, signal")
-        .in_("message_id", message_ids)
-        .execute()
-    )
-    return {row["message_id"]: row["signal"] for row in result.data}
+    client.table("documents").delete().eq("id", document_id).execute()
 
 
-def delete_document(document_id: str) -> None:
+@_offload
+def delete_all_records() -> list[str]:
     client = get_supabase_client()
-    threads = (
-        client.table("threads")
-        .select("id")
-        .eq("document_id", document_id)
-        .execute()
-    )
-    thread_ids = [t["id"] for t in threads.data]
-    for tid in thread_ids:
-        client.table("messages").delete().eq("thread_id", tid).execute()
-    if thread_ids:
-        client.table("threads").delete().in_("id", thread_ids).execute()
-    client.table("document_sections").delete().eq("document_id", document_id).execute()
-    client.table("documents").delete().eq("id", document_id).execute()
+    result = client.rpc("factory_reset").execute()
+    return result.data or []
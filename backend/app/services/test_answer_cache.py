@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from app.models.schemas import Citation
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.rag_pipeline import stream_rag_response
+
+CITATIONS = [Citation(page_start=3, page_end=3, section_heading="Capital", relevance_score=0.9, chunk_text="CET1")]
+
+
+async def _stream(*tokens: str):
+    for token in tokens:
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+
+def _cache(**overrides) -> SemanticAnswerCache:
+    options = {"max_entries": 8, "ttl_seconds": 60, "threshold": 0.95, **overrides}
+    return SemanticAnswerCache(**options)
+
+
+class TestSemanticAnswerCache:
+    def test_similar_query_hits(self):
+        cache = _cache()
+        cache.store("doc", "What is CET1?", np.array([1.0, 0.0]), None, "13.2%", CITATIONS, cache.generation("doc"))
+
+        hit = cache.lookup("doc", "What is CET1?", np.array([0.99, 0.05]))
+        assert hit.answer == "13.2%"
+        assert hit.citations == CITATIONS
+
+    def test_dissimilar_query_misses(self):
+        cache = _cache()
+        cache.store("doc", "What is CET1?", np.array([1.0, 0.0]), None, "13.2%", CITATIONS, 0)
+
+        assert cache.lookup("doc", "What is CET1?", np.array([0.7, 0.7])) is None
+        assert cache.stats()["misses"] == 1
+
+    def test_scoped_by_document_and_section(self):
+        cache = _cache()
+        cache.store("doc", "What is CET1?", np.array([1.0, 0.0]), "Capital", "13.2%", CITATIONS, 0)
+
+        assert cache.lookup("other", "What is CET1?", np.array([1.0, 0.0]), "Capital") is None
+        assert cache.lookup("doc", "What is CET1?", np.array([1.0, 0.0])) is None
+        assert cache.lookup("doc", "What is CET1?", np.array([1.0, 0.0]), "Capital") is not None
+
+    def test_expired_entries_miss(self):
+        cache = _cache()
+        with patch("app.services.answer_cache.time.monotonic", return_value=0.0):
+            cache.store("doc", "What is CET1?", np.array([1.0, 0.0]), None, "13.2%", CITATIONS, 0)
+        with patch("app.services.answer_cache.time.monotonic", return_value=61.0):
+            assert cache.lookup("doc", "What is CET1?", np.array([1.0, 0.0])) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = _cache(max_entries=2)
+        cache.store("a", "What is CET1?", np.array([1.0, 0.0]), None, "a", [], 0)
+        cache.store("b", "What is CET1?", np.array([1.0, 0.0]), None, "b", [], 0)
+        cache.lookup("a", "What is CET1?", np.array([1.0, 0.0]))
+        cache.store("c", "What is CET1?", np.array([1.0, 0.0]), None, "c", [], 0)
+
+        assert cache.lookup("b", "What is CET1?", np.array([1.0, 0.0])) is None
+        assert cache.lookup("a", "What is CET1?", np.array([1.0, 0.0])) is not None
+
+    def test_invalidation_drops_entries_and_late_writes(self):
+        cache = _cache()
+        generation = cache.generation("doc")
+        cache.store("doc", "What is CET1?", np.array([1.0, 0.0]), None, "old", CITATIONS, generation)
+
+        cache.invalidate_document("doc")
+        cache.store("doc", "What is CET1?", np.array([1.0, 0.0]), None, "in flight", CITATIONS, generation)
+
+        assert cache.lookup("doc", "What is CET1?", np.array([1.0, 0.0])) is None
+
+    def test_numbers_in_query_must_match(self):
+        cache = _cache()
+        cache.store("doc", "CET1 ratio in 2023?", np.array([1.0, 0.0]), None, "13.2%", CITATIONS, 0)
+
+        assert cache.lookup("doc", "CET1 ratio in 2024?", np.array([1.0, 0.0])) is None
+        assert cache.lookup("doc", "What was the CET1 ratio in 2023?", np.array([1.0, 0.0])) is not None
+
+    def test_shared_version_must_match(self):
+        cache = _cache()
+        cache.store("doc", "What is CET1?", np.array([1.0, 0.0]), None, "13.2%", CITATIONS, 0, version=1)
+
+        assert cache.lookup("doc", "What is CET1?", np.array([1.0, 0.0]), version=2) is None
+        assert cache.lookup("doc", "What is CET1?", np.array([1.0, 0.0]), version=1) is not None
+
+
+@pytest.mark.asyncio
+class TestStreamRagResponseCaching:
+    async def test_hit_streams_cached_answer_without_llm(self):
+        cache = _cache()
+        cache.store("doc", "What is CET1?", np.array([1.0, 0.0]), None, "13.2%", CITATIONS, 0)
+        with (
+            patch("app.services.rag_pipeline.get_answer_cache", return_value=cache),
+            patch("app.services.rag_pipeline.get_retrieval_cache", return_value=None),
+            patch("app.services.rag_pipeline.cached_query_embedding", return_value=np.array([1.0, 0.0])),
+            patch("app.services.rag_pipeline.retrieve_context", new_callable=AsyncMock, return_value=("", CITATIONS)),
+            patch("app.services.rag_pipeline.get_openai_client") as client,
+        ):
+            events = [e async for e in stream_rag_response("What is CET1?", "doc")]
+
+        assert [e[0] for e in events] == ["citations", "token", "done"]
+        assert events[1][1] == "13.2%"
+        assert events[2][2] == CITATIONS
+        client.assert_not_called()
+
+    async def test_lexical_fast_path_skips_cache_without_embedding(self):
+        cache = _cache()
+        with (
+            patch("app.services.rag_pipeline.get_answer_cache", return_value=cache),
+            patch("app.services.rag_pipeline.get_retrieval_cache", return_value=None),
+            patch("app.services.rag_pipeline.cached_query_embedding", return_value=None),
+            patch("app.services.rag_pipeline.embed_query", new_callable=AsyncMock) as embed,
+            patch("app.services.rag_pipeline.retrieve_context", new_callable=AsyncMock, return_value=("", CITATIONS)),
+            patch("app.services.rag_pipeline.get_openai_client") as client,
+        ):
+            client.return_value.chat.completions.create = AsyncMock(return_value=_stream("13.2%"))
+            events = [e async for e in stream_rag_response("What is CET1?", "doc")]
+
+        assert [e[0] for e in events] == ["citations", "token", "done"]
+        embed.assert_not_awaited()
+        assert cache.stats()["entries"] == 0 and cache.stats()["misses"] == 0
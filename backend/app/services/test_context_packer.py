@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from app.services.context_packer import overlap_length, pack_context
+
+
+def _hit(i: int, score: float, tokens: int = 100, section: str = "Risk") -> dict:
+    return {
+        "id": f"doc#{i}",
+        "chunk_index": i,
+        "score": score,
+        "token_count": tokens,
+        "section_heading": section,
+        "page_start": i + 1,
+        "page_end": i + 1,
+    }
+
+
+class TestOverlapLength:
+    def test_detects_sentence_overlap_window(self):
+        previous = "Revenue grew. Margins fell. Costs rose."
+        following = "Margins fell. Costs rose. Outlook is stable."
+        assert overlap_length(previous, following) == len("Margins fell. Costs rose.")
+
+    def test_no_overlap(self):
+        assert overlap_length("Revenue grew.", "Outlook is stable.") == 0
+
+    def test_ignores_partial_words(self):
+        assert overlap_length("The ratio is 13.2%", "2% higher") == 0
+
+
+class TestPackContext:
+    def test_adjacent_chunks_are_merged_without_repeated_overlap(self):
+        texts = {
+            "doc#3": "Revenue grew. Margins fell. Costs rose.",
+            "doc#4": "Margins fell. Costs rose. Outlook is stable.",
+        }
+        passages = pack_context([_hit(4, 0.7), _hit(3, 0.9)], texts, budget_tokens=1000)
+
+        assert len(passages) == 1
+        assert passages[0].text == "Revenue grew. Margins fell. Costs rose. Outlook is stable."
+        assert passages[0].chunk_ids == ["doc#3", "doc#4"]
+        assert passages[0].score == 0.9
+        assert (passages[0].page_start, passages[0].page_end) == (4, 5)
+        assert passages[0].token_count < 200
+
+    def test_chunks_in_different_sections_are_not_merged(self):
+        texts = {"doc#3": "a.", "doc#4": "b."}
+        passages = pack_context([_hit(3, 0.9), _hit(4, 0.8, section="Capital")], texts, budget_tokens=1000)
+        assert len(passages) == 2
+
+    def test_duplicate_text_is_dropped(self):
+        texts = {"doc#1": "Same text.", "doc#7": "Same text."}
+        passages = pack_context([_hit(1, 0.5), _hit(7, 0.8)], texts, budget_tokens=1000)
+        assert [p.chunk_ids for p in passages] == [["doc#7"]]
+
+    def test_budget_is_filled_in_score_order(self):
+        texts = {f"doc#{i}": f"Chunk {i}." for i in (0, 2, 4, 6)}
+        hits = [_hit(0, 0.2), _hit(2, 0.9, tokens=300), _hit(4, 0.8, tokens=300), _hit(6, 0.5)]
+        passages = pack_context(hits, texts, budget_tokens=500)
+        assert [p.chunk_ids[0] for p in passages] == ["doc#2", "doc#6", "doc#0"]
+
+    def test_fused_rank_outranks_raw_score(self):
+        texts = {f"doc#{i}": f"Chunk {i}." for i in (0, 2, 4)}
+        hits = [
+            {**_hit(0, 0.2, tokens=300), "rrf_score": 0.032},
+            {**_hit(2, 0.9, tokens=300), "rrf_score": 0.016},
+            {**_hit(4, 0.8), "rrf_score": 0.015},
+        ]
+        passages = pack_context(hits, texts, budget_tokens=500)
+        assert [p.chunk_ids[0] for p in passages] == ["doc#0", "doc#4"]
+
+    def test_top_passage_is_kept_even_if_over_budget(self):
+        passages = pack_context([_hit(0, 0.9, tokens=900)], {"doc#0": "Long."}, budget_tokens=500)
+        assert len(passages) == 1
+
+    def test_zero_budget_keeps_everything(self):
+        texts = {f"doc#{i}": f"Chunk {i}." for i in (0, 2)}
+        passages = pack_context([_hit(0, 0.2, tokens=10_000), _hit(2, 0.9, tokens=10_000)], texts, budget_tokens=0)
+        assert len(passages) == 2
@@ -5,7 +5,8 @@ from unittest.mock import AsyncMock, MagicMock, call, patch
 import pytest
 
 from app.models.schemas import DocumentStatus
-from app.services.document_processor import process_document
+from app.services.chunker import Chunk
+from app.services.document_processor import _chunk_hash, _index_version, process_document
 
 
 @pytest.fixture()
@@ -14,8 +15,12 @@ def _mock_externals():
         patch("app.services.document_processor.update_document_status") as mock_status,
         patch("app.services.document_processor.upload_to_supabase_storage", new_callable=AsyncMock) as mock_upload,
         patch("app.services.document_processor.embed_texts", new_callable=AsyncMock) as mock_embed,
-        patch("app.services.document_processor.upsert_chunks") as mock_upsert,
+        patch("app.services.document_processor.upsert_chunks", new_callable=AsyncMock) as mock_upsert,
+        patch("app.services.document_processor.refresh_local_copy", new_callable=AsyncMock) as mock_refresh,
+        patch("app.services.document_processor.invalidate_document_caches", new_callable=AsyncMock) as mock_invalidate,
         patch("app.services.document_processor.create_sections") as mock_sections,
+        patch("app.services.document_processor.create_chunks") as mock_chunks,
+        patch("app.services.document_processor.get_lexical_index") as mock_lexical,
         patch("app.services.document_processor._get_pdf_page_count", return_value=110) as mock_page_count,
     ):
         mock_upload.return_value = "https://example.com/file.pdf"
@@ -25,7 +30,11 @@ def _mock_externals():
             "upload": mock_upload,
             "embed": mock_embed,
             "upsert": mock_upsert,
+            "refresh": mock_refresh,
+            "invalidate": mock_invalidate,
             "sections": mock_sections,
+            "chunks": mock_chunks,
+            "lexical": mock_lexical,
             "page_count": mock_page_count,
         }
 
@@ -120,3 +129,105 @@ class TestProcessDocumentFallback:
         status_calls = _mock_externals["status"].call_args_list
         ready_call = [c for c in status_calls if c[0][1] == DocumentStatus.READY][0]
         assert ready_call[1]["page_count"] == 110
+
+
+def _chunk(i: int, text: str) -> Chunk:
+    return Chunk(
+        text=text,
+        chunk_index=i,
+        section_heading="Intro",
+        section_level=1,
+        parent_section="",
+        content_type="text",
+        page_start=1,
+        page_end=1,
+        token_count=3,
+    )
+
+
+@pytest.mark.asyncio
+class TestReplaceDocument:
+    @pytest.fixture()
+    def _diff_externals(self, _mock_externals):
+        with (
+            patch("app.services.document_processor.get_chunk_hashes") as mock_hashes,
+            patch("app.services.document_processor.delete_chunk_vectors", new_callable=AsyncMock) as mock_delete_vectors,
+            patch("app.services.document_processor.delete_chunks") as mock_delete_chunks,
+            patch("app.services.document_processor.delete_sections") as mock_delete_sections,
+            patch("app.config.settings.azure_di_enabled", False),
+        ):
+            yield {
+                **_mock_externals,
+                "hashes": mock_hashes,
+                "delete_vectors": mock_delete_vectors,
+                "delete_chunks": mock_delete_chunks,
+                "delete_sections": mock_delete_sections,
+            }
+
+    async def test_only_changed_chunks_are_embedded(self, _diff_externals):
+        old = [_chunk(0, "alpha"), _chunk(1, "beta"), _chunk(2, "gamma")]
+        new = [_chunk(0, "alpha"), _chunk(1, "beta revised")]
+        _diff_externals["hashes"].return_value = {c.chunk_index: _chunk_hash(c) for c in old}
+
+        with patch("app.services.document_processor._fallback_parse", return_value=(new, [], 1)):
+            await process_document("doc", b"%PDF-fake", "test.pdf", replace=True)
+
+        embedded = _diff_externals["embed"].call_args[0][0]
+        assert embedded == ["beta revised"]
+        upserted = _diff_externals["upsert"].call_args[0][1]
+        assert [c.chunk_index for c in upserted] == [1]
+        written = _diff_externals["chunks"].call_args[0][1]
+        assert [row["chunk_index"] for row in written] == [1]
+        _diff_externals["delete_vectors"].assert_awaited_once_with("doc", ["doc#2"])
+        _diff_externals["delete_chunks"].assert_called_once_with("doc", [2])
+        _diff_externals["delete_sections"].assert_called_once_with("doc")
+
+    async def test_unchanged_document_skips_embedding(self, _diff_externals):
+        chunks = [_chunk(0, "alpha"), _chunk(1, "beta")]
+        _diff_externals["hashes"].return_value = {c.chunk_index: _chunk_hash(c) for c in chunks}
+
+        with patch("app.services.document_processor._fallback_parse", return_value=(chunks, [], 1)):
+            await process_document("doc", b"%PDF-fake", "test.pdf", replace=True)
+
+        _diff_externals["embed"].assert_not_called()
+        _diff_externals["upsert"].assert_not_called()
+        _diff_externals["delete_vectors"].assert_not_called()
+        _diff_externals["lexical"].return_value.write.assert_called_once()
+
+    async def test_new_upload_does_not_diff(self, _diff_externals):
+        chunks = [_chunk(0, "alpha")]
+        with patch("app.services.document_processor._fallback_parse", return_value=(chunks, [], 1)):
+            await process_document("doc", b"%PDF-fake", "test.pdf")
+
+        _diff_externals["hashes"].assert_not_called()
+        _diff_externals["delete_sections"].assert_not_called()
+        assert _diff_externals["chunks"].call_args[0][1][0]["content_hash"] == _chunk_hash(chunks[0])
+
+    async def test_caches_invalidated_after_chunk_bodies_are_written(self, _diff_externals):
+        old = [_chunk(0, "alpha"), _chunk(1, "beta")]
+        new = [_chunk(0, "alpha revised")]
+        _diff_externals["hashes"].return_value = {c.chunk_index: _chunk_hash(c) for c in old}
+        order = MagicMock()
+        order.attach_mock(_diff_externals["chunks"], "create_chunks")
+        order.attach_mock(_diff_externals["delete_chunks"], "delete_chunks")
+        order.attach_mock(_diff_externals["invalidate"], "invalidate")
+
+        with patch("app.services.document_processor._fallback_parse", return_value=(new, [], 1)):
+            await process_document("doc", b"%PDF-fake", "test.pdf", replace=True)
+
+        assert [c[0] for c in order.mock_calls] == ["create_chunks", "delete_chunks", "invalidate"]
+
+    async def test_local_copy_moves_from_previous_to_new_version(self, _diff_externals):
+        old = [_chunk(0, "alpha"), _chunk(1, "beta")]
+        new = [_chunk(0, "alpha"), _chunk(1, "beta revised")]
+        _diff_externals["hashes"].return_value = {c.chunk_index: _chunk_hash(c) for c in old}
+
+        with patch("app.services.document_processor._fallback_parse", return_value=(new, [], 1)):
+            await process_document("doc", b"%PDF-fake", "test.pdf", replace=True)
+
+        _, version, base_version, chunks, _, removed_ids = _diff_externals["refresh"].call_args[0]
+        assert base_version == _index_version({c.chunk_index: _chunk_hash(c) for c in old})
+        assert version == _index_version({c.chunk_index: _chunk_hash(c) for c in new})
+        assert [c.chunk_index for c in chunks] == [1] and removed_ids == []
+        assert _diff_externals["lexical"].return_value.write.call_args[0][4] == version
+        assert _diff_externals["status"].call_args.kwargs["index_version"] == version
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from app.services.embedder import _embed_queries, embed_query, embed_texts
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_scheduler import MicroBatcher
+from app.services.ttl_cache import TTLCache
+
+
+class _CharEncoding:
+    def encode_batch(self, texts: list[str]) -> list[list[int]]:
+        return [[ord(ch) for ch in text] for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def _char_encoding():
+    with patch("app.services.embedding_backends.embedding_encoding", return_value=_CharEncoding()):
+        yield
+
+
+@pytest.fixture()
+def _no_cache():
+    with patch("app.config.settings.embedding_cache_enabled", False):
+        yield
+
+
+@pytest.fixture()
+def _tmp_cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=100)
+    with (
+        patch("app.config.settings.embedding_cache_enabled", True),
+        patch("app.services.embedder.get_embedding_cache", return_value=cache),
+    ):
+        yield cache
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_no_cache")
+class TestEmbedTexts:
+    async def test_returns_embeddings_in_input_order(self):
+        async def fake_create(batch):
+            return np.array([[float(tokens[0])] for tokens in batch], dtype=np.float32), {}
+
+        texts = [chr(ord("a") + n) * 3 for n in range(7)]
+        with (
+            patch("app.services.embedding_backends._create_embeddings", side_effect=fake_create) as mock_create,
+            patch("app.config.settings.embedding_batch_max_tokens", 10),
+        ):
+            result = await embed_texts(texts)
+
+        assert result.tolist() == [[float(ord(text[0]))] for text in texts]
+        assert mock_create.call_count == 3
+
+    async def test_empty_input_makes_no_requests(self):
+        with patch("app.services.embedding_backends._create_embeddings", new_callable=AsyncMock) as mock_create:
+            assert len(await embed_texts([])) == 0
+        mock_create.assert_not_called()
+
+
+def _decoded(batch) -> list[str]:
+    return ["".join(map(chr, tokens)) for tokens in batch]
+
+
+async def _fake_create(batch):
+    return np.array([[float(len(text)), 0.5] for text in batch], dtype=np.float32), {}
+
+
+@pytest.mark.asyncio
+class TestEmbedTextsCached:
+    async def test_second_call_hits_cache(self, _tmp_cache):
+        with patch("app.services.embedding_backends._create_embeddings", side_effect=_fake_create) as mock_create:
+            first = await embed_texts(["alpha", "beta"])
+            second = await embed_texts(["alpha", "beta"])
+
+        assert first.tolist() == second.tolist() == [[5.0, 0.5], [4.0, 0.5]]
+        assert mock_create.call_count == 1
+        assert _tmp_cache.stats()["hits"] == 2
+
+    async def test_only_changed_texts_are_embedded(self, _tmp_cache):
+        with patch("app.services.embedding_backends._create_embeddings", side_effect=_fake_create) as mock_create:
+            await embed_texts(["unchanged", "old"])
+            result = await embed_texts(["unchanged", "revised"])
+
+        assert result.tolist() == [[9.0, 0.5], [7.0, 0.5]]
+        assert _decoded(mock_create.call_args_list[-1].args[0]) == ["revised"]
+
+    async def test_duplicate_texts_embedded_once(self, _tmp_cache):
+        with patch("app.services.embedding_backends._create_embeddings", side_effect=_fake_create) as mock_create:
+            result = await embed_texts(["same", "same", "other"])
+
+        assert result.tolist() == [[4.0, 0.5], [4.0, 0.5], [5.0, 0.5]]
+        assert _decoded(mock_create.call_args.args[0]) == ["same", "other"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("_no_cache")
+class TestEmbedQuery:
+    @pytest.fixture(autouse=True)
+    def _query_cache(self):
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        with patch("app.services.embedder.get_query_embedding_cache", return_value=cache):
+            yield cache
+
+    async def test_repeat_question_skips_api(self, _query_cache):
+        with patch("app.services.embedding_backends._create_embeddings", side_effect=_fake_create) as mock_create:
+            first = await embed_query("What was net income?")
+            second = await embed_query("  what was   NET income? ")
+
+        assert first.tolist() == second.tolist()
+        assert mock_create.call_count == 1
+        assert _query_cache.stats()["hits"] == 1
+
+    async def test_expired_entry_is_refetched(self, _query_cache):
+        _query_cache.ttl_seconds = 0
+        with patch("app.services.embedding_backends._create_embeddings", side_effect=_fake_create) as mock_create:
+            await embed_query("net income")
+            await embed_query("net income")
+
+        assert mock_create.call_count == 2
+
+    async def test_concurrent_questions_share_one_request(self):
+        batcher = MicroBatcher(_embed_queries, max_wait_seconds=0.01, max_batch_size=64)
+        with (
+            patch("app.services.embedder.get_query_batcher", return_value=batcher),
+            patch("app.services.embedding_backends._create_embeddings", side_effect=_fake_create) as mock_create,
+        ):
+            results = await asyncio.gather(embed_query("net income"), embed_query("total revenue"))
+
+        assert [r.tolist() for r in results] == [[10.0, 0.5], [13.0, 0.5]]
+        assert mock_create.call_count == 1
+
+    async def test_bypasses_persistent_embedding_cache(self, _tmp_cache):
+        batcher = MicroBatcher(_embed_queries, max_wait_seconds=0, max_batch_size=64)
+        with (
+            patch("app.services.embedder.get_query_batcher", return_value=batcher),
+            patch("app.services.embedding_backends._create_embeddings", side_effect=_fake_create),
+            patch.object(_tmp_cache, "get_many") as get_many,
+            patch.object(_tmp_cache, "put_many") as put_many,
+        ):
+            await embed_query("what was net income in 2024?")
+
+        get_many.assert_not_called()
+        put_many.assert_not_called()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.embedding_backends import (
+    LocalHashingEmbeddingBackend,
+    OpenAIEmbeddingBackend,
+    _pack_batches,
+    get_embedding_backend,
+    get_embedding_scheduler,
+)
+from app.services.embedding_scheduler import RateLimited
+
+
+class _CharEncoding:
+    def encode_batch(self, texts: list[str]) -> list[list[int]]:
+        return [[ord(ch) for ch in text] for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def _char_encoding():
+    get_embedding_scheduler.cache_clear()
+    with patch("app.services.embedding_backends.embedding_encoding", return_value=_CharEncoding()):
+        yield
+    get_embedding_scheduler.cache_clear()
+
+
+class TestPackBatches:
+    def test_empty_input(self):
+        assert _pack_batches([], max_tokens=100, max_items=10) == []
+
+    def test_packs_by_token_budget(self):
+        assert _pack_batches([40, 40, 40, 40], max_tokens=100, max_items=10) == [(0, 2), (2, 4)]
+
+    def test_packs_by_item_cap(self):
+        assert _pack_batches([1] * 5, max_tokens=100, max_items=2) == [(0, 2), (2, 4), (4, 5)]
+
+    def test_input_over_budget_gets_own_batch(self):
+        assert _pack_batches([10, 500, 10], max_tokens=100, max_items=10) == [(0, 1), (1, 2), (2, 3)]
+
+    def test_small_inputs_share_one_request(self):
+        assert _pack_batches([5] * 300, max_tokens=250_000, max_items=2048) == [(0, 300)]
+
+
+class TestLocalHashingEmbeddingBackend:
+    def test_produces_unit_vectors_of_configured_dimensions(self):
+        backend = LocalHashingEmbeddingBackend(dimensions=256)
+        matrix = backend.embed_sync(["Net income rose 12% in fiscal 2024.", "CET1 ratio of 13.6%"])
+        assert matrix.shape == (2, 256)
+        assert matrix.dtype == np.float32
+        assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+
+    def test_is_deterministic_across_instances(self):
+        text = "Provision for credit losses increased year over year."
+        first = LocalHashingEmbeddingBackend(dimensions=128).embed_sync([text])
+        second = LocalHashingEmbeddingBackend(dimensions=128).embed_sync([text])
+        assert np.array_equal(first, second)
+
+    def test_similar_texts_score_higher_than_unrelated(self):
+        backend = LocalHashingEmbeddingBackend(dimensions=512)
+        query, related, unrelated = backend.embed_sync([
+            "what was the CET1 ratio",
+            "The CET1 ratio was 13.6% at year end.",
+            "Employees volunteered in local communities.",
+        ])
+        assert query @ related > query @ unrelated
+
+    def test_empty_text_is_zero_vector(self):
+        matrix = LocalHashingEmbeddingBackend(dimensions=64).embed_sync([""])
+        assert not matrix.any()
+
+    def test_model_name_separates_cache_keys_from_openai(self):
+        assert LocalHashingEmbeddingBackend(dimensions=64).model != OpenAIEmbeddingBackend().model
+
+
+class TestGetEmbeddingBackend:
+    @pytest.fixture(autouse=True)
+    def _clear(self):
+        get_embedding_backend.cache_clear()
+        yield
+        get_embedding_backend.cache_clear()
+
+    def test_selects_local_backend_from_settings(self):
+        with patch("app.config.settings.embedding_backend", "local"):
+            assert isinstance(get_embedding_backend(), LocalHashingEmbeddingBackend)
+
+    def test_rejects_unknown_backend(self):
+        with patch("app.config.settings.embedding_backend", "nope"):
+            with pytest.raises(ValueError):
+                get_embedding_backend()
+
+
+@pytest.mark.asyncio
+class TestOpenAIEmbeddingBackendTokenInputs:
+    async def test_sends_token_arrays_and_caps_oversized_inputs(self):
+        sent: list = []
+
+        async def fake_create(batch):
+            sent.extend(batch)
+            return np.zeros((len(batch), 4), dtype=np.float32), {}
+
+        with (
+            patch("app.services.embedding_backends._create_embeddings", side_effect=fake_create),
+            patch("app.config.settings.embedding_input_max_tokens", 8),
+        ):
+            result = await OpenAIEmbeddingBackend().embed(["abcde", "x" * 20])
+
+        assert result.shape == (2, 4)
+        assert [len(tokens) for tokens in sent] == [5, 8]
+        assert sent[0].tolist() == [ord(ch) for ch in "abcde"]
+
+    async def test_packs_token_inputs_by_exact_length(self):
+        batches: list = []
+
+        async def fake_create(batch):
+            batches.append(batch)
+            return np.zeros((len(batch), 4), dtype=np.float32), {}
+
+        with (
+            patch("app.services.embedding_backends._create_embeddings", side_effect=fake_create),
+            patch("app.config.settings.embedding_batch_max_tokens", 12),
+        ):
+            await OpenAIEmbeddingBackend().embed(["tokens"] * 4)
+
+        assert [len(batch) for batch in batches] == [2, 2]
+
+    async def test_rate_limit_backoff_carries_over_to_later_calls(self):
+        calls = 0
+
+        async def fake_create(batch):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RateLimited({"retry-after-ms": "1"})
+            return np.zeros((len(batch), 4), dtype=np.float32), {}
+
+        with (
+            patch("app.services.embedding_backends._create_embeddings", side_effect=fake_create),
+            patch("app.config.settings.embedding_max_concurrency", 8),
+        ):
+            await OpenAIEmbeddingBackend().embed(["first"])
+            scheduler = get_embedding_scheduler()
+            await OpenAIEmbeddingBackend().embed(["second"])
+
+        assert get_embedding_scheduler() is scheduler
+        assert scheduler.rate_limited_count == 1
+        assert scheduler.concurrency < scheduler.max_concurrency
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.services.embedding_cache import EmbeddingCache, cache_key
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), max_entries=10)
+    yield cache
+    cache.close()
+
+
+class TestCacheKey:
+    def test_key_depends_on_model_and_dimensions(self):
+        base = cache_key("text", "text-embedding-3-large", 1536)
+        assert base == cache_key("text", "text-embedding-3-large", 1536)
+        assert base != cache_key("text", "text-embedding-3-small", 1536)
+        assert base != cache_key("text", "text-embedding-3-large", 3072)
+
+
+class TestEmbeddingCache:
+    def test_round_trips_float32_vectors(self, cache):
+        cache.put_many({b"k": np.array([0.25, -1.5, 3.0])})
+        found = cache.get_many([b"k", b"missing"])
+        assert list(found) == [b"k"]
+        assert found[b"k"].dtype == np.float32
+        assert found[b"k"].tolist() == [0.25, -1.5, 3.0]
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "embeddings.sqlite3")
+        first = EmbeddingCache(path, max_entries=10)
+        first.put_many({b"k": np.array([1.0])})
+        first.close()
+
+        second = EmbeddingCache(path, max_entries=10)
+        assert second.get_many([b"k"])[b"k"].tolist() == [1.0]
+        assert second.stats()["entries"] == 1
+        second.close()
+
+    def test_evicts_least_recently_used_when_full(self, cache):
+        cache.put_many({f"k{i}".encode(): np.array([float(i)]) for i in range(10)})
+        cache.get_many([b"k0"])
+        cache.put_many({b"k10": np.array([10.0])})
+
+        stats = cache.stats()
+        assert stats["entries"] == 9
+        assert stats["evictions"] == 2
+        assert b"k0" in cache.get_many([b"k0"])
+        assert b"k10" in cache.get_many([b"k10"])
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import random
+
+import pytest
+
+from app.services.embedding_scheduler import (
+    BatchScheduler,
+    MicroBatcher,
+    RateLimited,
+    TransientError,
+    parse_duration,
+    retry_after_seconds,
+)
+
+
+class TestParseDuration:
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("20ms", 0.02),
+            ("1s", 1.0),
+            ("6m0s", 360.0),
+            ("1m30.5s", 90.5),
+            ("2", 2.0),
+            ("", None),
+            (None, None),
+            ("soon", None),
+        ],
+    )
+    def test_parses_openai_reset_formats(self, value, expected):
+        assert parse_duration(value) == expected
+
+    def test_retry_after_ms_takes_precedence(self):
+        headers = {"retry-after-ms": "150", "retry-after": "3"}
+        assert retry_after_seconds(headers) == 0.15
+
+    def test_falls_back_to_reset_header(self):
+        assert retry_after_seconds({"x-ratelimit-reset-requests": "250ms"}) == 0.25
+
+
+@pytest.mark.asyncio
+class TestBatchScheduler:
+    async def test_preserves_input_order(self):
+        async def request(batch: int):
+            await asyncio.sleep(random.uniform(0, 0.01))
+            return batch * 10, {}
+
+        scheduler = BatchScheduler(max_concurrency=4)
+        assert await scheduler.run(list(range(20)), request) == [i * 10 for i in range(20)]
+
+    async def test_never_exceeds_max_concurrency(self):
+        in_flight = 0
+        peak = 0
+
+        async def request(batch: int):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.005)
+            in_flight -= 1
+            return batch, {}
+
+        scheduler = BatchScheduler(max_concurrency=3)
+        await scheduler.run(list(range(12)), request)
+        assert peak == 3
+        assert scheduler.peak_in_flight == 3
+
+    async def test_retries_rate_limited_batch_and_halves_concurrency(self):
+        calls: dict[int, int] = {}
+
+        async def request(batch: int):
+            calls[batch] = calls.get(batch, 0) + 1
+            if batch == 0 and calls[batch] == 1:
+                raise RateLimited({"retry-after-ms": "1"})
+            return batch, {}
+
+        scheduler = BatchScheduler(max_concurrency=4)
+        assert await scheduler.run([0, 1, 2], request) == [0, 1, 2]
+        assert calls[0] == 2
+        assert scheduler.rate_limited_count == 1
+
+    async def test_gives_up_after_max_retries(self):
+        async def request(batch: int):
+            raise RateLimited({"retry-after-ms": "1"})
+
+        scheduler = BatchScheduler(max_concurrency=2, max_retries=2)
+        with pytest.raises(RateLimited):
+            await scheduler.run([0], request)
+
+    async def test_retries_transient_errors_with_backoff(self):
+        calls: dict[int, int] = {}
+
+        async def request(batch: int):
+            calls[batch] = calls.get(batch, 0) + 1
+            if calls[batch] <= 2:
+                raise TransientError("502 bad gateway")
+            return batch, {}
+
+        scheduler = BatchScheduler(max_concurrency=2, base_backoff=0.001)
+        assert await scheduler.run([0, 1], request) == [0, 1]
+        assert calls == {0: 3, 1: 3}
+        assert scheduler.concurrency == 2
+
+    async def test_gives_up_on_persistent_transient_error(self):
+        async def request(batch: int):
+            raise TransientError("connection reset")
+
+        scheduler = BatchScheduler(max_concurrency=2, max_retries=1, base_backoff=0.001)
+        with pytest.raises(TransientError):
+            await scheduler.run([0], request)
+
+    async def test_failure_releases_slot_to_waiters(self):
+        async def request(batch: int):
+            await asyncio.sleep(0.005)
+            if batch == 0:
+                raise ValueError("bad input")
+            return batch, {}
+
+        scheduler = BatchScheduler(max_concurrency=1)
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                scheduler._run_with_retries(0, request),
+                scheduler._run_with_retries(1, request),
+                return_exceptions=True,
+            ),
+            timeout=1,
+        )
+        assert isinstance(results[0], ValueError)
+        assert results[1] == 1
+        assert scheduler._in_flight == 0
+
+    async def test_low_remaining_quota_shrinks_concurrency(self):
+        headers = {"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "2"}
+
+        async def request(batch: int):
+            return batch, headers
+
+        scheduler = BatchScheduler(max_concurrency=4)
+        await scheduler.run([0, 1], request)
+        assert scheduler.concurrency < 4
+
+
+@pytest.mark.asyncio
+class TestMicroBatcher:
+    async def test_coalesces_concurrent_submissions(self):
+        flushed: list[list[str]] = []
+
+        async def flush(items: list[str]) -> list[str]:
+            flushed.append(items)
+            return [item.upper() for item in items]
+
+        batcher = MicroBatcher(flush, max_wait_seconds=0.01, max_batch_size=10)
+        results = await asyncio.gather(*(batcher.submit(q) for q in ["a", "b", "c"]))
+
+        assert results == ["A", "B", "C"]
+        assert flushed == [["a", "b", "c"]]
+
+    async def test_full_batch_dispatches_without_waiting(self):
+        flushed: list[list[int]] = []
+
+        async def flush(items: list[int]) -> list[int]:
+            flushed.append(items)
+            return items
+
+        batcher = MicroBatcher(flush, max_wait_seconds=10, max_batch_size=2)
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(4))), timeout=1
+        )
+
+        assert results == [0, 1, 2, 3]
+        assert flushed == [[0, 1], [2, 3]]
+
+    async def test_flush_error_reaches_every_waiter(self):
+        async def flush(items: list[int]) -> list[int]:
+            raise RuntimeError("embeddings down")
+
+        batcher = MicroBatcher(flush, max_wait_seconds=0.001, max_batch_size=10)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def test_zero_wait_disables_coalescing(self):
+        async def flush(items: list[int]) -> list[int]:
+            return items
+
+        batcher = MicroBatcher(flush, max_wait_seconds=0, max_batch_size=10)
+        await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+        assert batcher.stats()["batches"] == 2
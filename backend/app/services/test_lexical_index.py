@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from app.services.lexical_index import BM25Index, LexicalIndexStore, query_terms, reciprocal_rank_fusion
+from app.services.rag_pipeline import search_chunks
+from app.services.ttl_cache import TTLCache
+
+TEXTS = [
+    "The CET1 ratio was 13.2% at the end of fiscal 2024, up from 12.9%.",
+    "Provision for credit losses (PCL) increased due to retail delinquencies.",
+    "Net income rose on higher net interest income and fee revenue.",
+    "Capital ratios remain above regulatory minimums; the leverage ratio was 4.4%.",
+]
+
+
+def _metadata(n: int) -> list[dict]:
+    return [{"chunk_index": i, "section_heading": "Capital" if i in (0, 3) else "Results"} for i in range(n)]
+
+
+def _index() -> BM25Index:
+    return BM25Index.build([f"doc#{i}" for i in range(len(TEXTS))], _metadata(len(TEXTS)), TEXTS)
+
+
+class TestBM25Index:
+    def test_query_terms_drop_stopwords(self):
+        assert query_terms("What is the CET1 ratio in 2024?") == ["cet1", "ratio", "2024"]
+
+    def test_exact_term_ranks_first(self):
+        result = _index().search("What was the CET1 ratio?", top_k=3)
+        assert result.hits[0]["id"] == "doc#0"
+        assert result.hits[0]["score"] == 1.0
+        assert result.coverage == 1.0
+        assert result.margin > 1.0
+
+    def test_partial_match_lowers_coverage(self):
+        result = _index().search("PCL guidance for 2026", top_k=3)
+        assert result.hits[0]["id"] == "doc#1"
+        assert result.coverage == pytest.approx(1 / 3)
+
+    def test_section_filter(self):
+        result = _index().search("ratio", top_k=5, section_filter="Results")
+        assert result.hits == []
+
+    def test_no_terms_returns_nothing(self):
+        assert _index().search("what is the", top_k=3).hits == []
+
+
+class TestLexicalIndexStore:
+    def test_persists_and_reloads(self, tmp_path):
+        store = LexicalIndexStore(str(tmp_path), max_loaded=2)
+        store.write("doc", [f"doc#{i}" for i in range(len(TEXTS))], _metadata(len(TEXTS)), TEXTS)
+
+        reloaded = LexicalIndexStore(str(tmp_path), max_loaded=2)
+        result = reloaded.search("doc", "leverage ratio", top_k=2)
+        assert result.hits[0]["id"] == "doc#3"
+        assert result.hits[0]["section_heading"] == "Capital"
+
+    def test_miss_and_delete(self, tmp_path):
+        store = LexicalIndexStore(str(tmp_path), max_loaded=2)
+        assert store.search("doc", "ratio", top_k=2) is None
+        store.write("doc", ["doc#0"], _metadata(1), TEXTS[:1])
+        store.delete("doc")
+        assert store.search("doc", "ratio", top_k=2) is None
+        assert store.stats()["misses"] == 2
+
+    def test_clear_drops_every_document(self, tmp_path):
+        store = LexicalIndexStore(str(tmp_path), max_loaded=2)
+        for document_id in ("a", "b"):
+            store.write(document_id, [f"{document_id}#0"], _metadata(1), TEXTS[:1])
+        store.load("a")
+        store.clear()
+        assert store.load("a") is None and store.load("b") is None
+        assert not list(tmp_path.glob("*.npz"))
+
+
+class TestReciprocalRankFusion:
+    def test_items_in_both_rankings_rise(self):
+        vector = [{"id": "a", "score": 0.9}, {"id": "b", "score": 0.8}, {"id": "c", "score": 0.7}]
+        lexical = [{"id": "c", "score": 1.0}, {"id": "d", "score": 0.5}]
+        fused = reciprocal_rank_fusion([vector, lexical], k=60, top_k=3)
+        assert [hit["id"] for hit in fused] == ["c", "a", "b"]
+        assert fused[0]["score"] == 0.7
+
+
+@pytest.mark.asyncio
+class TestSearchChunks:
+    @pytest.fixture()
+    def lexical(self, tmp_path):
+        store = LexicalIndexStore(str(tmp_path), max_loaded=2)
+        store.write("doc", [f"doc#{i}" for i in range(len(TEXTS))], _metadata(len(TEXTS)), TEXTS, version="v1")
+        with (
+            patch("app.config.settings.retrieval_mode", "hybrid"),
+            patch("app.services.rag_pipeline.get_index_version", return_value="v1") as version,
+            patch("app.services.rag_pipeline.get_index_version_cache", return_value=TTLCache(8, 60)),
+            patch("app.services.rag_pipeline.get_lexical_index", return_value=store),
+            patch("app.services.rag_pipeline.embed_query", new_callable=AsyncMock, return_value=np.zeros(2)) as embed,
+            patch(
+                "app.services.rag_pipeline.query_vectors",
+                new_callable=AsyncMock,
+                return_value=[{"id": "doc#2", "score": 0.6}],
+            ),
+        ):
+            yield embed, version
+
+    async def test_confident_lexical_match_skips_embedding(self, lexical):
+        embed, _ = lexical
+        results = await search_chunks("CET1 ratio", "doc")
+        assert results[0]["id"] == "doc#0"
+        embed.assert_not_awaited()
+
+    async def test_weak_lexical_match_is_fused_with_vectors(self, lexical):
+        embed, _ = lexical
+        results = await search_chunks("PCL outlook", "doc")
+        embed.assert_awaited_once()
+        assert {hit["id"] for hit in results} == {"doc#1", "doc#2"}
+
+    async def test_stale_lexical_index_is_ignored(self, lexical):
+        _, version = lexical
+        version.return_value = "v2"
+        results = await search_chunks("CET1 ratio", "doc")
+        assert results == [{"id": "doc#2", "score": 0.6}]
+
+    async def test_missing_lexical_index_uses_vectors(self, lexical):
+        results = await search_chunks("CET1 ratio", "other")
+        assert results == [{"id": "doc#2", "score": 0.6}]
+
+    async def test_index_version_is_cached_between_searches(self, lexical):
+        _, version = lexical
+        await search_chunks("CET1 ratio", "doc")
+        await search_chunks("PCL outlook", "doc")
+        assert version.call_count == 1
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.chunker import Chunk
+from app.services.local_index import LocalVectorIndex, LocalVectorStore
+from app.services.vector_store import get_vector_store
+
+
+def _metadata(n: int) -> list[dict]:
+    return [
+        {"chunk_index": i, "section_heading": "Risk" if i % 2 else "Overview", "page_start": i, "page_end": i}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture()
+def index(tmp_path):
+    with patch("app.config.settings.embedding_dimensions", 16):
+        yield LocalVectorIndex(str(tmp_path), max_loaded=2)
+
+
+@pytest.fixture()
+def vectors():
+    rng = np.random.default_rng(7)
+    return rng.standard_normal((50, 16)).astype(np.float32)
+
+
+def _write(index: LocalVectorIndex, document_id: str, vectors: np.ndarray) -> None:
+    ids = [f"{document_id}#{i}" for i in range(len(vectors))]
+    index.write(document_id, ids, _metadata(len(vectors)), vectors)
+
+
+class TestLocalVectorIndex:
+    def test_matches_brute_force_cosine_ranking(self, index, vectors):
+        _write(index, "doc", vectors)
+        query = vectors[3] + 0.1
+
+        results = index.search("doc", query, top_k=5)
+
+        normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:5]
+        assert [r["id"] for r in results] == [f"doc#{i}" for i in expected]
+        assert results[0]["score"] >= results[-1]["score"]
+
+    def test_section_filter_restricts_rows(self, index, vectors):
+        _write(index, "doc", vectors)
+
+        results = index.search("doc", vectors[0], top_k=10, section_filter="Risk")
+
+        assert len(results) == 10
+        assert all(r["section_heading"] == "Risk" for r in results)
+
+    def test_unknown_section_returns_empty(self, index, vectors):
+        _write(index, "doc", vectors)
+        assert index.search("doc", vectors[0], top_k=5, section_filter="Nope") == []
+
+    def test_miss_returns_none(self, index, vectors):
+        assert index.search("missing", vectors[0], top_k=5) is None
+        assert index.stats()["misses"] == 1
+
+    def test_dimension_change_is_a_miss(self, index, vectors):
+        _write(index, "doc", vectors)
+        with patch("app.config.settings.embedding_dimensions", 32):
+            fresh = LocalVectorIndex(str(index.root), max_loaded=2)
+            assert fresh.search("doc", np.ones(32), top_k=5) is None
+
+    def test_rewrite_replaces_loaded_index(self, index, vectors):
+        _write(index, "doc", vectors)
+        index.search("doc", vectors[0], top_k=1)
+        _write(index, "doc", vectors[:3])
+
+        assert len(index.search("doc", vectors[0], top_k=10)) == 3
+
+    def test_delete_removes_files(self, index, vectors):
+        _write(index, "doc", vectors)
+        index.delete("doc")
+        assert index.search("doc", vectors[0], top_k=5) is None
+
+    def test_evicts_least_recently_loaded(self, index, vectors):
+        for document_id in ("a", "b", "c"):
+            _write(index, document_id, vectors)
+            index.search(document_id, vectors[0], top_k=1)
+        assert index.stats()["loaded_documents"] == 2
+
+    def test_vectors_file_not_matching_meta_is_a_miss(self, index, vectors):
+        _write(index, "doc", vectors)
+        with open(index.root / "doc" / "vectors.f32", "r+b") as f:
+            f.truncate(16 * 4 * 10)
+        assert index.search("doc", vectors[0], top_k=1) is None
+
+    def test_failed_write_removes_staging_dir(self, index, vectors):
+        with pytest.raises(TypeError):
+            index.write("doc", ["doc#0"], [{"section_heading": object()}], vectors[:1])
+        assert list(index.root.iterdir()) == []
+
+    def test_version_mismatch_is_a_miss(self, index, vectors):
+        index.write("doc", ["doc#0"], _metadata(1), vectors[:1], version="v1")
+        assert index.search("doc", vectors[0], top_k=1, version="v2") is None
+        assert len(index.search("doc", vectors[0], top_k=1, version="v1")) == 1
+
+    def test_update_merges_into_copy_at_base_version(self, index, vectors):
+        ids = [f"doc#{i}" for i in range(3)]
+        index.write("doc", ids, _metadata(3), vectors[:3], version="v1")
+        index.update("doc", "v2", "v1", ["doc#1", "doc#3"], _metadata(4)[1:], vectors[[10, 11, 12]], ["doc#2"])
+
+        loaded = index.load("doc")
+        assert loaded.version == "v2"
+        assert loaded.ids == ["doc#0", "doc#1", "doc#3"]
+        assert index.search("doc", vectors[10], top_k=1)[0]["id"] == "doc#1"
+
+    def test_update_deletes_copy_at_other_version(self, index, vectors):
+        index.write("doc", ["doc#0", "doc#1"], _metadata(2), vectors[:2], version="stale")
+        index.update("doc", "v2", "v1", ["doc#1"], _metadata(2)[1:], vectors[5:6], [])
+        assert index.load("doc") is None
+
+    def test_update_without_local_copy_does_not_write_partial_index(self, index, vectors):
+        index.update("doc", "v2", "v1", ["doc#1"], _metadata(2)[1:], vectors[5:6], [])
+        assert index.load("doc") is None
+
+    def test_update_without_base_version_writes_full_document(self, index, vectors):
+        index.update("doc", "v1", None, ["doc#0", "doc#1"], _metadata(2), vectors[:2], [])
+        assert index.load("doc").version == "v1"
+
+    @pytest.mark.asyncio
+    async def test_asearch_loads_cold_document_off_the_event_loop(self, index, vectors):
+        _write(index, "doc", vectors)
+        with patch("app.services.local_index.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            cold = await index.asearch("doc", vectors[0], top_k=1)
+            warm = await index.asearch("doc", vectors[0], top_k=1)
+
+        assert cold == warm
+        assert to_thread.call_count == 1
+
+
+def _chunk(i: int, section_heading: str = "Overview") -> Chunk:
+    return Chunk(
+        text="text",
+        chunk_index=i,
+        section_heading=section_heading,
+        section_level=1,
+        parent_section="",
+        content_type="text",
+        page_start=i,
+        page_end=i,
+        token_count=1,
+    )
+
+
+@pytest.mark.asyncio
+class TestLocalVectorStore:
+    async def test_upsert_query_fetch_delete(self, index, vectors):
+        store = LocalVectorStore(index)
+        await store.upsert("doc", [_chunk(i, "Risk" if i % 2 else "Overview") for i in range(4)], vectors[:4])
+
+        results = await store.query(vectors[3], "doc", top_k=1)
+        assert results[0]["id"] == "doc#3"
+        assert results[0]["section_heading"] == "Risk"
+
+        fetched = await store.fetch(["doc#1", "doc#9", "other#0"])
+        assert list(fetched) == ["doc#1"]
+        assert fetched["doc#1"]["chunk_index"] == 1
+        np.testing.assert_allclose(
+            fetched["doc#1"]["values"], vectors[1] / np.linalg.norm(vectors[1]), rtol=1e-5
+        )
+
+        await store.delete_document("doc")
+        assert await store.query(vectors[0], "doc") == []
+
+    async def test_upsert_merges_by_id(self, index, vectors):
+        store = LocalVectorStore(index)
+        await store.upsert("doc", [_chunk(0), _chunk(1)], vectors[:2])
+        await store.upsert("doc", [_chunk(1, "Risk"), _chunk(2)], vectors[10:12])
+
+        loaded = index.load("doc")
+        assert loaded.ids == ["doc#0", "doc#1", "doc#2"]
+        assert loaded.metadata[1]["section_heading"] == "Risk"
+        results = await store.query(vectors[10], "doc", top_k=1)
+        assert results[0]["id"] == "doc#1"
+
+
+class TestGetVectorStore:
+    def test_selects_local_backend(self):
+        get_vector_store.cache_clear()
+        try:
+            with patch("app.config.settings.vector_store_backend", "local"):
+                assert isinstance(get_vector_store(), LocalVectorStore)
+        finally:
+            get_vector_store.cache_clear()
+
+    def test_unknown_backend_raises(self):
+        get_vector_store.cache_clear()
+        try:
+            with patch("app.config.settings.vector_store_backend", "faiss"):
+                with pytest.raises(ValueError):
+                    get_vector_store()
+        finally:
+            get_vector_store.cache_clear()
+
+
+class TestRemove:
+    def test_drops_rows_and_keeps_others(self, index, vectors):
+        _write(index, "doc", vectors[:4])
+        index.remove("doc", ["doc#1", "doc#3"])
+
+        assert index.load("doc").ids == ["doc#0", "doc#2"]
+        assert index.search("doc", vectors[2], top_k=1)[0]["id"] == "doc#2"
+
+    def test_removing_every_row_deletes_document(self, index, vectors):
+        _write(index, "doc", vectors[:2])
+        index.remove("doc", ["doc#0", "doc#1"])
+
+        assert index.load("doc") is None
+
+    def test_delete_many_drops_only_listed_documents(self, index, vectors):
+        for document_id in ("a", "b", "c"):
+            _write(index, document_id, vectors[:2])
+        index.load("a")
+        index.delete_many(["a", "b"])
+
+        assert index.load("a") is None and index.load("b") is None
+        assert index.load("c") is not None
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.services.chunker import Chunk
+from app.services.local_index import LocalVectorIndex
+from app.services.pinecone_store import PineconeVectorStore, _pack_upsert_batches
+
+
+@pytest.fixture(autouse=True)
+def _no_local_index():
+    with patch("app.config.settings.local_index_enabled", False):
+        yield
+
+
+def _chunk(i: int, section_heading: str = "Overview") -> Chunk:
+    return Chunk(
+        text="text",
+        chunk_index=i,
+        section_heading=section_heading,
+        section_level=1,
+        parent_section="",
+        content_type="text",
+        page_start=1,
+        page_end=1,
+        token_count=1,
+    )
+
+
+class _RecordingIndex:
+    def __init__(self, fail_first: int = 0, delay: float = 0.0):
+        self.batches: list[list[dict]] = []
+        self.namespaces: set[str] = set()
+        self.fail_first = fail_first
+        self.delay = delay
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors: list[dict], namespace: str = "") -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            should_fail = self.fail_first > 0
+            self.fail_first -= 1
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if should_fail:
+            raise ConnectionError("pinecone unavailable")
+        self.batches.append(vectors)
+        self.namespaces.add(namespace)
+
+
+class TestPackUpsertBatches:
+    def test_splits_by_count(self):
+        chunks = [_chunk(i) for i in range(5)]
+        assert _pack_upsert_batches("doc", chunks, 4, max_count=2, max_bytes=10**9) == [(0, 2), (2, 4), (4, 5)]
+
+    def test_splits_by_payload_bytes(self):
+        chunks = [_chunk(i, section_heading="x" * 1000) for i in range(4)]
+        batches = _pack_upsert_batches("doc", chunks, 4, max_count=100, max_bytes=3000)
+        assert batches == [(0, 2), (2, 4)]
+
+
+@pytest.mark.asyncio
+class TestUpsertChunks:
+    async def test_upserts_every_vector_with_values_as_lists(self):
+        index = _RecordingIndex()
+        chunks = [_chunk(i) for i in range(7)]
+        embeddings = np.arange(14, dtype=np.float32).reshape(7, 2)
+        with (
+            patch("app.services.pinecone_store.get_pinecone_index", return_value=index),
+            patch("app.config.settings.pinecone_upsert_batch_size", 3),
+        ):
+            await PineconeVectorStore().upsert("doc", chunks, embeddings)
+
+        vectors = sorted((v for batch in index.batches for v in batch), key=lambda v: v["metadata"]["chunk_index"])
+        assert [v["id"] for v in vectors] == [f"doc#{i}" for i in range(7)]
+        assert vectors[3]["values"] == [6.0, 7.0]
+        assert len(index.batches) == 3
+
+    async def test_runs_batches_in_parallel_up_to_limit(self):
+        index = _RecordingIndex(delay=0.02)
+        chunks = [_chunk(i) for i in range(8)]
+        with (
+            patch("app.services.pinecone_store.get_pinecone_index", return_value=index),
+            patch("app.config.settings.pinecone_upsert_batch_size", 1),
+            patch("app.config.settings.pinecone_upsert_concurrency", 3),
+        ):
+            await PineconeVectorStore().upsert("doc", chunks, np.zeros((8, 2), dtype=np.float32))
+
+        assert index.peak_in_flight == 3
+
+    async def test_retries_failed_batch(self):
+        index = _RecordingIndex(fail_first=1)
+        with (
+            patch("app.services.pinecone_store.get_pinecone_index", return_value=index),
+            patch("app.services.pinecone_store.asyncio.sleep"),
+        ):
+            await PineconeVectorStore().upsert("doc", [_chunk(0)], np.zeros((1, 2), dtype=np.float32))
+
+        assert len(index.batches) == 1
+
+    async def test_raises_after_max_retries(self):
+        index = _RecordingIndex(fail_first=10)
+        with (
+            patch("app.services.pinecone_store.get_pinecone_index", return_value=index),
+            patch("app.services.pinecone_store.asyncio.sleep"),
+            patch("app.config.settings.pinecone_upsert_max_retries", 2),
+        ):
+            with pytest.raises(ConnectionError):
+                await PineconeVectorStore().upsert("doc", [_chunk(0)], np.zeros((1, 2), dtype=np.float32))
+
+    async def test_chunk_text_is_not_stored_in_metadata(self):
+        index = _RecordingIndex()
+        with patch("app.services.pinecone_store.get_pinecone_index", return_value=index):
+            await PineconeVectorStore().upsert("doc", [_chunk(0)], np.zeros((1, 2), dtype=np.float32))
+
+        assert "chunk_text" not in index.batches[0][0]["metadata"]
+
+
+@pytest.mark.asyncio
+class TestLocalIndexIntegration:
+    @pytest.fixture()
+    def local_index(self, tmp_path):
+        index = LocalVectorIndex(str(tmp_path), max_loaded=4)
+        with (
+            patch("app.config.settings.local_index_enabled", True),
+            patch("app.config.settings.embedding_dimensions", 2),
+            patch("app.services.pinecone_store.get_local_index", return_value=index),
+        ):
+            yield index
+
+    async def test_query_served_locally_at_current_version(self, local_index):
+        embeddings = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+        chunks = [_chunk(0), _chunk(1, "Risk")]
+        await PineconeVectorStore().refresh_local_copy("doc", "v1", None, chunks, embeddings, [])
+        results = await PineconeVectorStore().query(np.array([0.1, 0.9]), "doc", top_k=1, version="v1")
+
+        assert results[0]["id"] == "doc#1"
+        assert results[0]["section_heading"] == "Risk"
+
+    async def test_stale_local_copy_falls_back_to_pinecone(self, local_index):
+        embeddings = np.array([[1.0, 0.0]], dtype=np.float32)
+        await PineconeVectorStore().refresh_local_copy("doc", "v1", None, [_chunk(0)], embeddings, [])
+        remote = MagicMock()
+        remote.query.return_value = {"matches": []}
+        with patch("app.services.pinecone_store.get_pinecone_index", return_value=remote):
+            await PineconeVectorStore().query(np.array([1.0, 0.0]), "doc", version="v2")
+            await PineconeVectorStore().query(np.array([1.0, 0.0]), "doc")
+
+        assert remote.query.call_count == 2
+
+    async def test_upsert_leaves_local_copy_alone(self, local_index):
+        with patch("app.services.pinecone_store.get_pinecone_index", return_value=_RecordingIndex()):
+            await PineconeVectorStore().upsert("doc", [_chunk(0)], np.ones((1, 2), dtype=np.float32))
+
+        assert local_index.load("doc") is None
+
+    async def test_falls_back_to_pinecone_on_miss(self, local_index):
+        remote = MagicMock()
+        remote.query.return_value = {"matches": [{"id": "other#0", "score": 0.5, "metadata": {"chunk_index": 0}}]}
+        with patch("app.services.pinecone_store.get_pinecone_index", return_value=remote):
+            results = await PineconeVectorStore().query(np.array([1.0, 0.0]), "other", top_k=3, version="v1")
+
+        remote.query.assert_called_once()
+        assert results == [{"id": "other#0", "score": 0.5, "chunk_index": 0}]
+
+
+@pytest.mark.asyncio
+class TestNamespacePerDocument:
+    @pytest.fixture(autouse=True)
+    def _per_document(self):
+        with patch("app.config.settings.pinecone_namespace_per_document", True):
+            yield
+
+    async def test_upserts_into_document_namespace(self):
+        index = _RecordingIndex()
+        with patch("app.services.pinecone_store.get_pinecone_index", return_value=index):
+            await PineconeVectorStore().upsert("doc", [_chunk(0)], np.zeros((1, 2), dtype=np.float32))
+
+        assert index.namespaces == {"doc"}
+
+    async def test_query_skips_document_filter(self):
+        remote = MagicMock()
+        remote.query.return_value = {"matches": []}
+        with patch("app.services.pinecone_store.get_pinecone_index", return_value=remote):
+            await PineconeVectorStore().query(np.array([1.0, 0.0]), "doc", section_filter="Risk")
+
+        kwargs = remote.query.call_args.kwargs
+        assert kwargs["namespace"] == "doc"
+        assert kwargs["filter"] == {"section_heading": {"$eq": "Risk"}}
+
+    async def test_delete_drops_namespace(self):
+        remote = MagicMock()
+        with (
+            patch("app.services.pinecone_store.get_pinecone_index", return_value=remote),
+            patch("app.services.pinecone_store.get_local_index"),
+        ):
+            await PineconeVectorStore().delete_document("doc")
+
+        remote.delete.assert_called_once_with(delete_all=True, namespace="doc")
+
+    async def test_bulk_delete_drops_each_namespace(self):
+        remote = MagicMock()
+        with (
+            patch("app.services.pinecone_store.get_pinecone_index", return_value=remote),
+            patch("app.services.pinecone_store.get_local_index"),
+        ):
+            await PineconeVectorStore().delete_documents(["a", "b", "c"])
+
+        namespaces = {c.kwargs["namespace"] for c in remote.delete.call_args_list}
+        assert namespaces == {"a", "b", "c"}
+
+
+@pytest.mark.asyncio
+class TestBulkDelete:
+    async def test_shared_namespace_deletes_by_batched_filter(self):
+        remote = MagicMock()
+        ids = [f"doc-{i}" for i in range(1200)]
+        with (
+            patch("app.services.pinecone_store.get_pinecone_index", return_value=remote),
+            patch("app.services.pinecone_store.get_local_index") as local,
+        ):
+            await PineconeVectorStore().delete_documents(ids)
+
+        batches = [c.kwargs["filter"]["document_id"]["$in"] for c in remote.delete.call_args_list]
+        assert sorted(len(b) for b in batches) == [200, 500, 500]
+        assert sorted(i for b in batches for i in b) == sorted(ids)
+        local.return_value.delete_many.assert_called_once_with(ids)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from app.models.schemas import Citation
+from app.services.rag_pipeline import retrieve_context
+from app.services.retrieval_cache import InProcessRetrievalCache, RedisRetrievalCache
+from app.services.ttl_cache import TTLCache
+from app.services.vector_store import delete_document_vectors
+
+
+def _citation() -> Citation:
+    return Citation(page_start=1, page_end=2, section_heading="Risk", relevance_score=0.9, chunk_text="text")
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+
+class _BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.asyncio
+class TestRetrievalCacheKeys:
+    async def test_key_normalises_query(self):
+        cache = InProcessRetrievalCache(8, 60)
+        assert await cache.key("doc", "What is  Revenue?", None, 20) == await cache.key("doc", "what is revenue?", None, 20)
+
+    async def test_key_varies_by_section_and_top_k(self):
+        cache = InProcessRetrievalCache(8, 60)
+        base = await cache.key("doc", "q", None, 20)
+        assert base != await cache.key("doc", "q", "Risk", 20)
+        assert base != await cache.key("doc", "q", None, 10)
+        assert base != await cache.key("other", "q", None, 20)
+
+    async def test_invalidation_changes_key(self):
+        cache = InProcessRetrievalCache(8, 60)
+        key = await cache.key("doc", "q", None, 20)
+        await cache.set(key, ("context", [_citation()]))
+
+        await cache.invalidate_document("doc")
+
+        assert await cache.get(await cache.key("doc", "q", None, 20)) is None
+
+
+@pytest.mark.asyncio
+class TestRedisRetrievalCache:
+    async def test_round_trips_citations(self):
+        cache = RedisRetrievalCache(_FakeRedis(), ttl_seconds=60)
+        key = await cache.key("doc", "q", None, 20)
+        await cache.set(key, ("context", [_citation()]))
+
+        assert await cache.get(key) == ("context", [_citation()])
+
+    async def test_invalidation_is_shared_across_instances(self):
+        client = _FakeRedis()
+        writer = RedisRetrievalCache(client, ttl_seconds=60)
+        reader = RedisRetrievalCache(client, ttl_seconds=60)
+        await writer.set(await writer.key("doc", "q", None, 20), ("context", []))
+
+        await reader.invalidate_document("doc")
+
+        assert await writer.get(await writer.key("doc", "q", None, 20)) is None
+
+    async def test_unavailable_redis_bypasses_cache(self):
+        cache = RedisRetrievalCache(_BrokenRedis(), ttl_seconds=60)
+        assert await cache.key("doc", "q", None, 20) is None
+
+
+@pytest.mark.asyncio
+class TestRetrieveContextCaching:
+    @pytest.fixture()
+    def cache(self):
+        cache = InProcessRetrievalCache(8, 60)
+        with (
+            patch("app.services.rag_pipeline.get_retrieval_cache", return_value=cache),
+            patch("app.services.retrieval_cache.get_retrieval_cache", return_value=cache),
+        ):
+            yield cache
+
+    @pytest.fixture()
+    def retrieval(self):
+        result = {"id": "doc#0", "score": 0.8, "section_heading": "Risk", "page_start": 1, "page_end": 1}
+        with (
+            patch("app.services.rag_pipeline.embed_query", new_callable=AsyncMock, return_value=np.zeros(2)),
+            patch("app.services.rag_pipeline.query_vectors", new_callable=AsyncMock, return_value=[result]) as query,
+            patch("app.services.rag_pipeline.get_chunk_texts", return_value={"doc#0": "chunk body"}),
+            patch("app.services.rag_pipeline.get_index_version", return_value="v1") as version,
+            patch("app.services.rag_pipeline.get_index_version_cache", return_value=TTLCache(8, 60)) as versions,
+            patch("app.dependencies.get_index_version_cache", versions),
+        ):
+            yield query, version
+
+    async def test_repeat_question_is_served_from_cache(self, cache, retrieval):
+        retrieval, _ = retrieval
+        first = await retrieve_context("What are the risks?", "doc")
+        second = await retrieve_context("what are the  risks?", "doc")
+
+        assert first == second
+        assert "chunk body" in first[0]
+        assert retrieval.await_count == 1
+        assert cache.hits == 1
+
+    async def test_deleting_document_invalidates(self, cache, retrieval):
+        retrieval, version = retrieval
+        await retrieve_context("q", "doc")
+        with patch("app.services.vector_store.get_vector_store") as store:
+            store.return_value.delete_document = AsyncMock()
+            await delete_document_vectors("doc")
+        await retrieve_context("q", "doc")
+
+        assert retrieval.await_count == 2
+        assert version.call_count == 2
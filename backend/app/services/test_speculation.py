@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.services.speculation import SpeculationStats, SpeculativeRetrieval
+
+
+@pytest.fixture()
+def stats():
+    stats = SpeculationStats()
+    with patch("app.services.speculation.get_speculation_stats", return_value=stats):
+        yield stats
+
+
+def _slow_retrieval(delay: float, fail: bool = False):
+    async def retrieve(query, document_id):
+        await asyncio.sleep(delay)
+        if fail:
+            raise ConnectionError("pinecone unavailable")
+        return f"context for {query}", []
+
+    return retrieve
+
+
+@pytest.mark.asyncio
+class TestSpeculativeRetrieval:
+    async def test_overlapped_time_is_recorded_as_saved(self, stats):
+        with patch("app.services.speculation.retrieve_context", _slow_retrieval(0.05)):
+            speculative = SpeculativeRetrieval("q", "doc")
+            await asyncio.sleep(0.04)
+            result = await speculative.result()
+
+        assert result == ("context for q", [])
+        assert stats.used == 1
+        assert 25 <= stats.last_saved_ms <= 50
+
+    async def test_discard_cancels_retrieval(self, stats):
+        with patch("app.services.speculation.retrieve_context", _slow_retrieval(10)):
+            speculative = SpeculativeRetrieval("q", "doc")
+            await asyncio.sleep(0)
+            speculative.discard()
+            await asyncio.sleep(0)
+
+        assert speculative.task.cancelled()
+        assert stats.stats()["discarded"] == 1
+
+    async def test_failure_falls_back_to_none(self, stats):
+        with patch("app.services.speculation.retrieve_context", _slow_retrieval(0, fail=True)):
+            speculative = SpeculativeRetrieval("q", "doc")
+            assert await speculative.result() is None
+
+        assert stats.failed == 1
+        assert stats.used == 0
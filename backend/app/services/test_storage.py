@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services import storage
+
+
+def _fake_bucket(objects: list[str], fail_delete: bool = False):
+    deleted: list[list[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if request.method == "DELETE":
+            if fail_delete:
+                return httpx.Response(500)
+            deleted.append(body["prefixes"])
+            return httpx.Response(200, json=[])
+
+        prefix = body["prefix"]
+        base = f"{prefix}/" if prefix else ""
+        entries: dict[str, dict] = {}
+        for path in objects:
+            if not path.startswith(base):
+                continue
+            name, _, rest = path[len(base):].partition("/")
+            entries[name] = {"name": name, "id": None if rest else f"id-{path}"}
+        page = sorted(entries)[body["offset"] : body["offset"] + body["limit"]]
+        return httpx.Response(200, json=[entries[name] for name in page])
+
+    def client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url="http://storage/storage/v1", transport=httpx.MockTransport(handler))
+
+    return client, deleted
+
+
+@pytest.mark.asyncio
+class TestDeletePrefix:
+    async def test_pages_through_listing_and_nested_folders(self):
+        objects = [f"doc-{d}/report-{f}.pdf" for d in range(7) for f in range(3)] + ["loose.pdf"]
+        client, deleted = _fake_bucket(objects)
+        with (
+            patch.object(storage, "_storage_client", client),
+            patch.object(storage, "LIST_PAGE_SIZE", 2),
+            patch.object(storage, "DELETE_BATCH_SIZE", 5),
+        ):
+            count = await storage.delete_prefix()
+
+        assert count == len(objects)
+        assert sorted(path for batch in deleted for path in batch) == sorted(objects)
+        assert max(len(batch) for batch in deleted) == 5
+
+    async def test_scopes_to_document_prefix(self):
+        objects = ["doc-1/a.pdf", "doc-1/b.pdf", "doc-2/a.pdf"]
+        client, deleted = _fake_bucket(objects)
+        with patch.object(storage, "_storage_client", client):
+            count = await storage.delete_prefix("doc-1")
+
+        assert count == 2
+        assert sorted(deleted[0]) == ["doc-1/a.pdf", "doc-1/b.pdf"]
+
+    async def test_storage_errors_are_logged_not_raised(self):
+        client, _ = _fake_bucket(["doc-1/a.pdf"], fail_delete=True)
+        with patch.object(storage, "_storage_client", client):
+            assert await storage.delete_prefix("doc-1") == 0
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+
+from app.services import supabase_client
+
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="")
+
+
+def _fake_client(rows: list[dict], delay: float = 0.0) -> MagicMock:
+    def execute():
+        time.sleep(delay)
+        return MagicMock(data=rows)
+
+    client = MagicMock()
+    client.table.return_value.select.return_value.eq.return_value.execute.side_effect = execute
+    return client
+
+
+@pytest.mark.asyncio
+class TestOffload:
+    async def test_runs_on_supabase_executor(self):
+        @supabase_client._offload
+        def whoami() -> str:
+            return threading.current_thread().name
+
+        assert (await whoami()).startswith("supabase")
+
+    async def test_preserves_context_variables(self):
+        @supabase_client._offload
+        def current_request() -> str:
+            return request_id.get()
+
+        request_id.set("req-42")
+        assert await current_request() == "req-42"
+
+    async def test_exceptions_propagate(self):
+        @supabase_client._offload
+        def broken() -> None:
+            raise ConnectionError("supabase unavailable")
+
+        with pytest.raises(ConnectionError):
+            await broken()
+
+    async def test_blocking_query_does_not_stall_the_loop(self):
+        rows = [{"id": "t1", "title": "Q3"}]
+        with patch.object(supabase_client, "get_supabase_client", return_value=_fake_client(rows, delay=0.2)):
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            thread = await supabase_client.get_thread("t1")
+            task.cancel()
+
+        assert thread == rows[0]
+        assert ticks >= 10
+
+
+def _recording_client(rows: list[dict]) -> MagicMock:
+    query = MagicMock()
+    for method in ("select", "eq", "lt", "or_", "order", "limit"):
+        getattr(query, method).return_value = query
+    query.execute.return_value = MagicMock(data=rows)
+    client = MagicMock()
+    client.table.return_value = query
+    return client
+
+
+@pytest.mark.asyncio
+class TestListThreadMessages:
+    async def test_reads_feedback_joined_view_in_one_query(self):
+        client = _recording_client([{"id": "m1"}, {"id": "m2"}])
+        with patch.object(supabase_client, "get_supabase_client", return_value=client):
+            messages = await supabase_client.list_thread_messages("t1")
+
+        client.table.assert_called_once_with("thread_messages")
+        query = client.table.return_value
+        query.select.assert_called_once_with(supabase_client.THREAD_MESSAGE_COLUMNS)
+        assert query.order.call_args_list == [call("created_at", desc=False), call("id", desc=False)]
+        query.lt.assert_not_called()
+        query.limit.assert_not_called()
+        assert query.execute.call_count == 1
+        assert [m["id"] for m in messages] == ["m1", "m2"]
+
+    async def test_page_is_newest_first_before_cursor_returned_chronologically(self):
+        client = _recording_client([{"id": "m9"}, {"id": "m8"}, {"id": "m7"}])
+        with patch.object(supabase_client, "get_supabase_client", return_value=client):
+            messages = await supabase_client.list_thread_messages(
+                "t1", before="2026-01-01T00:00:00+00:00", limit=3, columns="id, created_at"
+            )
+
+        query = client.table.return_value
+        query.select.assert_called_once_with("id, created_at")
+        query.lt.assert_called_once_with("created_at", "2026-01-01T00:00:00+00:00")
+        assert query.order.call_args_list == [call("created_at", desc=True), call("id", desc=True)]
+        query.limit.assert_called_once_with(3)
+        assert [m["id"] for m in messages] == ["m7", "m8", "m9"]
+
+
+@pytest.mark.asyncio
+class TestListings:
+    async def test_documents_page_uses_summary_projection_and_cursor(self):
+        client = _recording_client([{"id": "d2"}, {"id": "d1"}])
+        with patch.object(supabase_client, "get_supabase_client", return_value=client):
+            docs = await supabase_client.list_documents(
+                before="2026-01-01T00:00:00+00:00", limit=2, columns=supabase_client.DOCUMENT_SUMMARY_COLUMNS
+            )
+
+        client.table.assert_called_once_with("documents")
+        query = client.table.return_value
+        query.select.assert_called_once_with(supabase_client.DOCUMENT_SUMMARY_COLUMNS)
+        query.lt.assert_called_once_with("created_at", "2026-01-01T00:00:00+00:00")
+        assert query.order.call_args_list == [call("created_at", desc=True), call("id", desc=True)]
+        query.limit.assert_called_once_with(2)
+        assert "sections" not in supabase_client.DOCUMENT_SUMMARY_COLUMNS
+        assert [d["id"] for d in docs] == ["d2", "d1"]
+
+    async def test_cursor_id_breaks_created_at_ties(self):
+        client = _recording_client([{"id": "t1"}])
+        with patch.object(supabase_client, "get_supabase_client", return_value=client):
+            await supabase_client.list_threads(before="2026-01-01T00:00:00+00:00", before_id="t9", limit=1)
+
+        query = client.table.return_value
+        query.lt.assert_not_called()
+        query.or_.assert_called_once_with(
+            'created_at.lt."2026-01-01T00:00:00+00:00",and(created_at.eq."2026-01-01T00:00:00+00:00",id.lt.t9)'
+        )
+
+    async def test_unbounded_listing_for_internal_callers(self):
+        client = _recording_client([{"id": "t1"}])
+        with patch.object(supabase_client, "get_supabase_client", return_value=client):
+            await supabase_client.list_threads()
+
+        query = client.table.return_value
+        query.select.assert_called_once_with("*")
+        query.lt.assert_not_called()
+        query.limit.assert_not_called()
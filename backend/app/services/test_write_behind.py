@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.services.write_behind import WriteBehindQueue
+
+
+class _RecordingWriter:
+    def __init__(self, fail_first: int = 0, delay: float = 0.0):
+        self.calls: list[tuple[str, list[dict]]] = []
+        self.fail_first = fail_first
+        self.delay = delay
+
+    async def __call__(self, table: str, rows: list[dict]) -> None:
+        await asyncio.sleep(self.delay)
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            raise ConnectionError("supabase unavailable")
+        self.calls.append((table, [row["id"] for row in rows]))
+
+
+def _queue(writer, **overrides) -> WriteBehindQueue:
+    options = {"max_size": 100, "batch_size": 10, "max_wait_seconds": 0.01, "max_retries": 2, "base_backoff": 0.0}
+    return WriteBehindQueue(writer, **{**options, **overrides})
+
+
+@pytest.mark.asyncio
+class TestWriteBehindQueue:
+    async def test_batches_consecutive_writes_per_table_in_order(self):
+        writer = _RecordingWriter()
+        queue = _queue(writer)
+        await queue.put("threads", {"id": "t1"})
+        for i in range(3):
+            await queue.put("messages", {"id": f"m{i}"})
+        await queue.flush()
+
+        assert writer.calls == [("threads", ["t1"]), ("messages", ["m0", "m1", "m2"])]
+        stats = queue.stats()
+        assert stats["written"] == 4
+        assert stats["batches"] == 2
+        assert stats["depth"] == 0
+        assert stats["max_lag_ms"] > 0
+        await queue.stop()
+
+    async def test_respects_batch_size(self):
+        writer = _RecordingWriter()
+        queue = _queue(writer, batch_size=2)
+        for i in range(5):
+            await queue.put("messages", {"id": f"m{i}"})
+        await queue.flush()
+
+        assert [len(ids) for _, ids in writer.calls] == [2, 2, 1]
+        await queue.stop()
+
+    async def test_pending_thread_visible_until_written(self):
+        writer = _RecordingWriter()
+        queue = _queue(writer, max_wait_seconds=0.05)
+        await queue.put("threads", {"id": "t1", "document_id": "doc"})
+
+        assert queue.pending_thread("t1") == {"id": "t1", "document_id": "doc"}
+        await queue.flush()
+        assert queue.pending_thread("t1") is None
+        await queue.stop()
+
+    async def test_retries_then_drops(self):
+        writer = _RecordingWriter(fail_first=10)
+        queue = _queue(writer)
+        await queue.put("messages", {"id": "m0"})
+        await queue.flush()
+
+        assert queue.stats()["failed"] == 1
+        assert writer.fail_first == 7
+
+        writer.fail_first = 1
+        await queue.put("messages", {"id": "m1"})
+        await queue.flush()
+        assert writer.calls == [("messages", ["m1"])]
+        await queue.stop()
+
+    async def test_stop_flushes_pending_writes(self):
+        writer = _RecordingWriter()
+        queue = _queue(writer, batch_size=100)
+        for i in range(3):
+            await queue.put("messages", {"id": f"m{i}"})
+
+        await queue.stop()
+
+        assert writer.calls == [("messages", ["m0", "m1", "m2"])]
+
+    async def test_flush_waits_only_for_rows_queued_before_it(self):
+        writer = _RecordingWriter(delay=0.001)
+        queue = _queue(writer, batch_size=1, max_wait_seconds=0.0)
+        for i in range(3):
+            await queue.put("messages", {"id": f"m{i}"})
+
+        async def steady_traffic() -> None:
+            i = 3
+            while True:
+                await queue.put("messages", {"id": f"m{i}"})
+                i += 1
+                await asyncio.sleep(0)
+
+        producer = asyncio.create_task(steady_traffic())
+        await asyncio.wait_for(queue.flush(), timeout=1.0)
+        producer.cancel()
+
+        assert [ids for _, ids in writer.calls[:3]] == [["m0"], ["m1"], ["m2"]]
+        await queue.stop()
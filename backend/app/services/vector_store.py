@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from app.services.chunker import Chunk
+
+
+def vector_id(document_id: str, chunk_index: int) -> str:
+    return f"{document_id}#{chunk_index}"
+
+
+def chunk_metadata(document_id: str, chunk: Chunk) -> dict:
+    return {
+        "document_id": document_id,
+        "chunk_index": chunk.chunk_index,
+        "section_heading": chunk.section_heading,
+        "section_level": chunk.section_level,
+        "parent_section": chunk.parent_section,
+        "content_type": chunk.content_type,
+        "page_start": chunk.page_start,
+        "page_end": chunk.page_end,
+        "token_count": chunk.token_count,
+    }
+
+
+class VectorStore(ABC):
+    @abstractmethod
+    async def upsert(self, document_id: str, chunks: list[Chunk], embeddings: np.ndarray) -> None: ...
+
+    @abstractmethod
+    async def query(
+        self,
+        query_embedding: np.ndarray,
+        document_id: str,
+        top_k: int = 8,
+        section_filter: str | None = None,
+        version: str | None = None,
+    ) -> list[dict]: ...
+
+    @abstractmethod
+    async def delete_document(self, document_id: str) -> None: ...
+
+    @abstractmethod
+    async def delete_ids(self, document_id: str, ids: list[str]) -> None: ...
+
+    @abstractmethod
+    async def delete_documents(self, document_ids: list[str]) -> None: ...
+
+    @abstractmethod
+    async def fetch(self, ids: list[str]) -> dict[str, dict]: ...
+
+    async def refresh_local_copy(
+        self,
+        document_id: str,
+        version: str,
+        base_version: str | None,
+        chunks: list[Chunk],
+        embeddings: np.ndarray | None,
+        removed_ids: list[str],
+    ) -> None:
+        return None
+
+
+@lru_cache
+def get_vector_store() -> VectorStore:
+    if settings.vector_store_backend == "pinecone":
+        from app.services.pinecone_store import PineconeVectorStore
+
+        return PineconeVectorStore()
+    if settings.vector_store_backend == "local":
+        from app.dependencies import get_local_index
+        from app.services.local_index import LocalVectorStore
+
+        return LocalVectorStore(get_local_index())
+    raise ValueError(f"Unknown vector store backend: {settings.vector_store_backend}")
+
+
+async def invalidate_document_caches(document_id: str) -> None:
+    from app.dependencies import get_index_version_cache
+    from app.services.answer_cache import get_answer_cache
+    from app.services.retrieval_cache import get_retrieval_cache
+
+    get_index_version_cache().pop(document_id)
+    get_answer_cache().invalidate_document(document_id)
+    cache = get_retrieval_cache()
+    if cache is not None:
+        await cache.invalidate_document(document_id)
+
+
+async def upsert_chunks(document_id: str, chunks: list[Chunk], embeddings: np.ndarray) -> None:
+    await get_vector_store().upsert(document_id, chunks, embeddings)
+
+
+async def query_vectors(
+    query_embedding: np.ndarray,
+    document_id: str,
+    top_k: int = 8,
+    section_filter: str | None = None,
+    version: str | None = None,
+) -> list[dict]:
+    return await get_vector_store().query(query_embedding, document_id, top_k, section_filter, version)
+
+
+async def delete_document_vectors(document_id: str) -> None:
+    await get_vector_store().delete_document(document_id)
+    await invalidate_document_caches(document_id)
+
+
+async def delete_documents_vectors(document_ids: list[str]) -> None:
+    await get_vector_store().delete_documents(document_ids)
+    try:
+        async with asyncio.TaskGroup() as group:
+            for document_id in document_ids:
+                group.create_task(invalidate_document_caches(document_id))
+    except BaseExceptionGroup as eg:
+        raise eg.exceptions[0]
+
+
+async def delete_chunk_vectors(document_id: str, ids: list[str]) -> None:
+    await get_vector_store().delete_ids(document_id, ids)
+
+
+async def refresh_local_copy(
+    document_id: str,
+    version: str,
+    base_version: str | None,
+    chunks: list[Chunk],
+    embeddings: np.ndarray | None,
+    removed_ids: list[str],
+) -> None:
+    await get_vector_store().refresh_local_copy(document_id, version, base_version, chunks, embeddings, removed_ids)
+
+
+async def fetch_vectors(ids: list[str]) -> dict[str, dict]:
+    return await get_vector_store().fetch(ids)
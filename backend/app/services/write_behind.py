@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from app.config import settings
+from app.services.supabase_client import insert_rows
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Write:
+    table: str
+    row: dict
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        write: Callable[[str, list[dict]], Awaitable[None]],
+        max_size: int,
+        batch_size: int,
+        max_wait_seconds: float,
+        max_retries: int = 3,
+        base_backoff: float = 0.5,
+    ):
+        self.write = write
+        self.batch_size = max(1, batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._lag_ms_total = 0.0
+        self._queue: asyncio.Queue[_Write] = asyncio.Queue(maxsize=max_size)
+        self._enqueued = 0
+        self._completed = 0
+        self._progress = asyncio.Condition()
+        self._pending_threads: dict[str, dict] = {}
+        self._worker: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def put(self, table: str, row: dict) -> None:
+        self.start()
+        if table == "threads":
+            self._pending_threads[row["id"]] = row
+        await self._queue.put(_Write(table, row))
+        self._enqueued += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def pending_thread(self, thread_id: str) -> dict | None:
+        return self._pending_threads.get(thread_id)
+
+    async def flush(self) -> None:
+        if self._worker is None or self._worker.done():
+            return
+        watermark = self._enqueued
+        async with self._progress:
+            await self._progress.wait_for(lambda: self._completed >= watermark or self._worker.done())
+
+    async def stop(self) -> None:
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _next_batch(self) -> list[_Write]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                start = 0
+                for end in range(1, len(batch) + 1):
+                    if end == len(batch) or batch[end].table != batch[start].table:
+                        await self._write_group(batch[start:end])
+                        start = end
+            finally:
+                self._completed += len(batch)
+                async with self._progress:
+                    self._progress.notify_all()
+
+    async def _write_group(self, group: list[_Write]) -> None:
+        table = group[0].table
+        rows = [w.row for w in group]
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self.write(table, rows)
+                    break
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        self.failed += len(rows)
+                        logger.error(f"Dropping {len(rows)} {table} rows after {attempt + 1} attempts: {e}")
+                        return
+                    delay = self.base_backoff * 2**attempt
+                    logger.warning(f"Write of {len(rows)} {table} rows failed, retrying in {delay:.1f}s: {e}")
+                    await asyncio.sleep(delay)
+        finally:
+            if table == "threads":
+                for row in rows:
+                    self._pending_threads.pop(row["id"], None)
+
+        lag_ms = (time.monotonic() - group[0].enqueued_at) * 1000
+        self.batches += 1
+        self.written += len(rows)
+        self.last_lag_ms = lag_ms
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        self._lag_ms_total += lag_ms * len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "capacity": self._queue.maxsize,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_lag_ms": round(self.last_lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "mean_lag_ms": round(self._lag_ms_total / self.written, 1) if self.written else 0.0,
+        }
+
+
+@lru_cache
+def get_write_queue() -> WriteBehindQueue:
+    return WriteBehindQueue(
+        insert_rows,
+        max_size=settings.write_queue_max_size,
+        batch_size=settings.write_queue_batch_size,
+        max_wait_seconds=settings.write_queue_max_wait_ms / 1000,
+        max_retries=settings.write_queue_max_retries,
+    )
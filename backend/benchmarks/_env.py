@@ -0,0 +1,6 @@
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ.setdefault("PINECONE_API_KEY", "bench")
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "bench")
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import MagicMock, patch
+
+from benchmarks import _env  # noqa: F401
+
+
+def _slow_client(db_latency: float) -> MagicMock:
+    def execute():
+        time.sleep(db_latency)
+        return MagicMock(data=[{"id": "t1", "document_id": "d1", "title": "bench"}])
+
+    query = MagicMock()
+    query.execute.side_effect = execute
+    for method in ("select", "eq", "lt", "order", "limit", "insert", "update"):
+        getattr(query, method).return_value = query
+    client = MagicMock()
+    client.table.return_value = query
+    return client
+
+
+async def _run(
+    offloaded: bool,
+    chats: int,
+    background: int,
+    concurrency: int,
+    tokens: int,
+    token_gap: float,
+) -> tuple[list[float], list[float]]:
+    from app.services import supabase_client
+
+    def db(name: str):
+        func = getattr(supabase_client, name)
+        if offloaded:
+            return func
+        blocking = func.__wrapped__
+
+        async def inline(*args, **kwargs):
+            return blocking(*args, **kwargs)
+
+        return inline
+
+    get_thread, list_messages, list_threads = db("get_thread"), db("list_thread_messages"), db("list_threads")
+    limiter = asyncio.Semaphore(concurrency)
+    first_token: list[float] = []
+    total: list[float] = []
+
+    async def chat(i: int) -> None:
+        async with limiter:
+            start = time.perf_counter()
+            await get_thread(f"t{i}")
+            await list_messages(f"t{i}", limit=50)
+            for n in range(tokens):
+                await asyncio.sleep(token_gap)
+                if n == 0:
+                    first_token.append(time.perf_counter() - start)
+            total.append(time.perf_counter() - start)
+
+    async def browse() -> None:
+        async with limiter:
+            await list_threads()
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            for i in range(max(chats, background)):
+                if i < chats:
+                    group.create_task(chat(i))
+                if i < background:
+                    group.create_task(browse())
+    except BaseExceptionGroup as eg:
+        raise eg.exceptions[0]
+    return first_token, total
+
+
+def _pct(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chat latency with Supabase calls inline vs on the executor")
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--background", type=int, default=200, help="concurrent thread-listing requests")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-gap", type=float, default=0.01)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[4, 16, 32])
+    args = parser.parse_args()
+
+    from app.config import settings
+    from app.dependencies import get_supabase_executor
+    from app.services import supabase_client
+
+    print(
+        f"{args.chats} chats + {args.background} list requests, concurrency {args.concurrency}, "
+        f"{args.db_latency * 1000:.0f} ms per query"
+    )
+    runs = [("inline", None)] + [(f"pool={size}", size) for size in args.pool_sizes]
+    with patch.object(supabase_client, "get_supabase_client", return_value=_slow_client(args.db_latency)):
+        for label, pool_size in runs:
+            if pool_size is not None:
+                settings.supabase_pool_size = pool_size
+                get_supabase_executor.cache_clear()
+            start = time.perf_counter()
+            first_token, total = asyncio.run(
+                _run(
+                    pool_size is not None,
+                    args.chats,
+                    args.background,
+                    args.concurrency,
+                    args.tokens,
+                    args.token_gap,
+                )
+            )
+            elapsed = time.perf_counter() - start
+            print(
+                f"  {label:8s}  ttft p50={_pct(first_token, 50):7.1f}ms p99={_pct(first_token, 99):7.1f}ms  "
+                f"chat p50={_pct(total, 50):7.1f}ms p99={_pct(total, 99):7.1f}ms  "
+                f"throughput={(args.chats + args.background) / elapsed:6.1f} req/s"
+            )
+            if pool_size is not None:
+                get_supabase_executor().shutdown()
+
+
+if __name__ == "__main__":
+    main()
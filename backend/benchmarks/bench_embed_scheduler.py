@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.fake_openai import create_app, serve
+
+
+async def _run(texts: list[str], concurrency: int, dimensions: int, batch_items: int) -> float:
+    from app.config import settings
+    from app.dependencies import get_openai_client
+    from app.services import embedder
+
+    get_openai_client.cache_clear()
+    settings.embedding_cache_enabled = False
+    settings.embedding_max_concurrency = concurrency
+    settings.embedding_dimensions = dimensions
+    settings.embedding_batch_max_items = batch_items
+    start = time.perf_counter()
+    embeddings = await embedder.embed_texts(texts)
+    elapsed = time.perf_counter() - start
+    assert len(embeddings) == len(texts)
+    await get_openai_client().close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serial vs concurrent embed_texts against a fixed-latency fake server")
+    parser.add_argument("--chunks", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.25)
+    parser.add_argument("--dimensions", type=int, default=64, help="kept small so JSON encoding does not dominate")
+    parser.add_argument("--batch-items", type=int, default=100)
+    parser.add_argument("--rpm-window", type=int, default=None, help="requests allowed per 1s window before 429s")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    texts = [f"chunk {i} of a synthetic annual report" for i in range(args.chunks)]
+    app = create_app(latency=args.latency, requests_per_window=args.rpm_window)
+
+    with serve(app) as base_url:
+        os.environ["OPENAI_BASE_URL"] = base_url
+        print(f"{args.chunks} texts, {args.latency * 1000:.0f} ms server latency")
+        baseline = None
+        for concurrency in args.concurrency:
+            app.state.requests = 0
+            app.state.rate_limited = 0
+            elapsed = asyncio.run(_run(texts, concurrency, args.dimensions, args.batch_items))
+            baseline = baseline or elapsed
+            print(
+                f"  concurrency={concurrency:<3} {elapsed:7.2f}s  "
+                f"speedup={baseline / elapsed:5.2f}x  requests={app.state.requests}  "
+                f"429s={app.state.rate_limited}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import tracemalloc
+from unittest.mock import patch
+
+import numpy as np
+
+from benchmarks import _env  # noqa: F401
+from app.services.chunker import Chunk
+
+
+class _DiscardingIndex:
+    def __init__(self):
+        self.vectors = 0
+
+    def upsert(self, vectors: list[dict], namespace: str = "") -> None:
+        self.vectors += len(vectors)
+
+
+def _chunks(n: int) -> list[Chunk]:
+    return [
+        Chunk(
+            text=f"chunk {i} " * 60,
+            chunk_index=i,
+            section_heading="Management's Discussion and Analysis",
+            section_level=1,
+            parent_section="",
+            content_type="text",
+            page_start=i // 4 + 1,
+            page_end=i // 4 + 1,
+            token_count=300,
+        )
+        for i in range(n)
+    ]
+
+
+def _responses(n: int, dimensions: int, batch_size: int, encoding_format: str) -> list[bytes]:
+    rng = np.random.default_rng(0)
+    payloads = []
+    for start in range(0, n, batch_size):
+        count = min(batch_size, n - start)
+        matrix = rng.standard_normal((count, dimensions), dtype=np.float32)
+        if encoding_format == "base64":
+            data = [{"index": i, "embedding": base64.b64encode(row.tobytes()).decode()} for i, row in enumerate(matrix)]
+        else:
+            data = [{"index": i, "embedding": row.tolist()} for i, row in enumerate(matrix)]
+        payloads.append(json.dumps({"data": data}).encode())
+    return payloads
+
+
+def _legacy_ingest(document_id: str, chunks: list[Chunk], payloads: list[bytes]) -> int:
+    embeddings: list[list[float]] = []
+    for payload in payloads:
+        embeddings.extend(item["embedding"] for item in json.loads(payload)["data"])
+
+    index = _DiscardingIndex()
+    vectors = []
+    for chunk, embedding in zip(chunks, embeddings):
+        vectors.append({
+            "id": f"{document_id}#{chunk.chunk_index}",
+            "values": embedding,
+            "metadata": {"chunk_text": chunk.text, "chunk_index": chunk.chunk_index},
+        })
+    for i in range(0, len(vectors), 100):
+        index.upsert(vectors=vectors[i : i + 100])
+    return index.vectors
+
+
+def _numpy_ingest(document_id: str, chunks: list[Chunk], payloads: list[bytes], dtype: str) -> int:
+    from app.services.embedding_backends import _decode_embedding
+    from app.services.pinecone_store import PineconeVectorStore
+
+    blocks = []
+    for payload in payloads:
+        data = json.loads(payload)["data"]
+        block = np.empty((len(data), len(_decode_embedding(data[0]["embedding"]))), dtype=dtype)
+        for item in data:
+            block[item["index"]] = _decode_embedding(item["embedding"])
+        blocks.append(block)
+        del data
+    embeddings = np.concatenate(blocks)
+    del blocks
+
+    index = _DiscardingIndex()
+    with patch("app.services.pinecone_store.get_pinecone_index", return_value=index):
+        asyncio.run(PineconeVectorStore().upsert(document_id, chunks, embeddings))
+    return index.vectors
+
+
+def _peak_mb(fn, *args) -> float:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Peak Python heap of the embed -> upsert path")
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    chunks = _chunks(args.chunks)
+    float_payloads = _responses(args.chunks, args.dimensions, args.batch_size, "float")
+    base64_payloads = _responses(args.chunks, args.dimensions, args.batch_size, "base64")
+
+    legacy = _peak_mb(_legacy_ingest, "doc", chunks, float_payloads)
+    float32 = _peak_mb(_numpy_ingest, "doc", chunks, base64_payloads, "float32")
+    float16 = _peak_mb(_numpy_ingest, "doc", chunks, base64_payloads, "float16")
+
+    print(f"{args.chunks} chunks x {args.dimensions} dims, peak traced heap")
+    print(f"  list[list[float]] : {legacy:8.1f} MB")
+    print(f"  ndarray float32   : {float32:8.1f} MB  ({legacy / float32:4.1f}x smaller)")
+    print(f"  ndarray float16   : {float16:8.1f} MB  ({legacy / float16:4.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from benchmarks import _env  # noqa: F401
+
+
+async def _embed(texts: list[str]) -> float:
+    from app.services.embedder import embed_texts
+
+    start = time.perf_counter()
+    matrix = await embed_texts(texts)
+    assert matrix.shape[0] == len(texts)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline embed_texts throughput with the local hashing backend")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    args = parser.parse_args()
+
+    from app.config import settings
+    from app.dependencies import get_embedding_cache
+    from app.services.embedding_backends import get_embedding_backend
+
+    words = "revenue net income capital ratio provision credit losses fiscal quarter segment".split()
+    texts = [
+        " ".join(words[(i + j) % len(words)] for j in range(300)) + f" chunk {i}"
+        for i in range(args.chunks)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.embedding_backend = "local"
+        settings.embedding_dimensions = args.dimensions
+        settings.embedding_cache_path = f"{tmp}/embeddings.sqlite3"
+        settings.embedding_cache_max_entries = args.chunks * 2
+        get_embedding_backend.cache_clear()
+        get_embedding_cache.cache_clear()
+
+        settings.embedding_cache_enabled = False
+        uncached = asyncio.run(_embed(texts))
+        settings.embedding_cache_enabled = True
+        cold = asyncio.run(_embed(texts))
+        warm = asyncio.run(_embed(texts))
+        get_embedding_cache().close()
+
+    print(f"{args.chunks} chunks x {args.dimensions} dims, local hashing backend")
+    print(f"  no cache   : {uncached:6.2f}s  {args.chunks / uncached:9.0f} chunks/s")
+    print(f"  cold cache : {cold:6.2f}s  {args.chunks / cold:9.0f} chunks/s")
+    print(f"  warm cache : {warm:6.2f}s  {args.chunks / warm:9.0f} chunks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import _env  # noqa: F401
+
+
+def _percentiles(samples: list[float]) -> str:
+    q = statistics.quantiles(samples, n=100)
+    return f"p50={q[49] * 1000:7.3f}ms  p99={q[98] * 1000:7.3f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local per-document top-k vs the remote Pinecone query path")
+    parser.add_argument("--vectors", type=int, nargs="+", default=[500, 2000, 8000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument(
+        "--pinecone-document-id",
+        help="also time real Pinecone queries for this already-ingested document (needs PINECONE_API_KEY)",
+    )
+    args = parser.parse_args()
+
+    from app.config import settings
+    from app.services.local_index import LocalVectorIndex
+
+    settings.embedding_dimensions = args.dimensions
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LocalVectorIndex(tmp, max_loaded=8)
+        print(f"{args.dimensions} dims, top_k={args.top_k}, {args.queries} queries")
+        for n in args.vectors:
+            vectors = rng.standard_normal((n, args.dimensions)).astype(np.float32)
+            metadata = [{"chunk_index": i, "section_heading": f"Section {i % 25}"} for i in range(n)]
+            index.write(f"doc-{n}", [f"doc-{n}#{i}" for i in range(n)], metadata, vectors)
+            queries = rng.standard_normal((args.queries, args.dimensions)).astype(np.float32)
+
+            start = time.perf_counter()
+            index.search(f"doc-{n}", queries[0], args.top_k)
+            cold = time.perf_counter() - start
+
+            full, filtered = [], []
+            for query in queries:
+                start = time.perf_counter()
+                index.search(f"doc-{n}", query, args.top_k)
+                full.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                index.search(f"doc-{n}", query, args.top_k, section_filter="Section 3")
+                filtered.append(time.perf_counter() - start)
+
+            print(f"  {n:>6} vectors  cold load={cold * 1000:6.2f}ms")
+            print(f"           full     {_percentiles(full)}")
+            print(f"           section  {_percentiles(filtered)}")
+
+    if args.pinecone_document_id:
+        from app.services.pinecone_store import PineconeVectorStore
+
+        settings.local_index_enabled = False
+        remote = []
+        for query in rng.standard_normal((min(args.queries, 50), args.dimensions)).astype(np.float32):
+            start = time.perf_counter()
+            asyncio.run(PineconeVectorStore().query(query, args.pinecone_document_id, top_k=args.top_k))
+            remote.append(time.perf_counter() - start)
+        print(f"  pinecone remote   {_percentiles(remote)}")
+    else:
+        print("  (pass --pinecone-document-id to time the remote Pinecone path for comparison)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.fake_openai import create_app, serve
+
+
+async def _run(queries: list[str], arrival_gap: float, max_wait_ms: float) -> tuple[list[float], int]:
+    from app.config import settings
+    from app.dependencies import get_openai_client, get_query_embedding_cache
+    from app.services import embedder
+
+    settings.embedding_cache_enabled = False
+    settings.embedding_dimensions = 64
+    settings.query_batch_max_wait_ms = max_wait_ms
+    get_openai_client.cache_clear()
+    get_query_embedding_cache().clear()
+    embedder.get_query_batcher.cache_clear()
+
+    latencies: list[float] = []
+    failures = 0
+
+    async def one(query: str) -> None:
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            await embedder.embed_query(query)
+        except Exception:
+            failures += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    for query in queries:
+        tasks.append(asyncio.create_task(one(query)))
+        await asyncio.sleep(arrival_gap)
+    await asyncio.gather(*tasks)
+    await get_openai_client().close()
+    return latencies, failures
+
+
+def _pct(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="embed_query latency with and without micro-batching")
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=1000.0, help="query arrivals per second")
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--rpm-window", type=int, default=None, help="requests allowed per 1s window before 429s")
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[0.0, 2.0, 5.0])
+    args = parser.parse_args()
+
+    queries = [f"question {i} about the annual report" for i in range(args.queries)]
+    app = create_app(latency=args.latency, requests_per_window=args.rpm_window)
+    with serve(app) as base_url:
+        os.environ["OPENAI_BASE_URL"] = base_url
+        print(f"{args.queries} queries at {args.rate:.0f}/s, {args.latency * 1000:.0f} ms server latency")
+        for max_wait_ms in args.max_wait_ms:
+            app.state.requests = 0
+            app.state.rate_limited = 0
+            start = time.perf_counter()
+            latencies, failures = asyncio.run(_run(queries, 1 / args.rate, max_wait_ms))
+            elapsed = time.perf_counter() - start
+            print(
+                f"  max_wait={max_wait_ms:4.1f}ms  p50={_pct(latencies, 50):7.1f}ms  "
+                f"p99={_pct(latencies, 99):7.1f}ms  requests={app.state.requests}  "
+                f"429s={app.state.rate_limited}  failed={failures}  throughput={len(queries) / elapsed:6.1f} q/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def _fake_vector(text: str, dimensions: int, encoding_format: str) -> list[float] | str:
+    seed = np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8)
+    vector = np.resize(seed, dimensions).astype(np.float32) / 255.0
+    if encoding_format == "base64":
+        return base64.b64encode(vector.tobytes()).decode()
+    return vector.tolist()
+
+
+def create_app(latency: float, requests_per_window: int | None = None, window: float = 1.0) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.inputs = 0
+    app.state.rate_limited = 0
+    window_state = {"start": time.monotonic(), "count": 0}
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dimensions = body.get("dimensions", 1536)
+        encoding_format = body.get("encoding_format", "float")
+
+        now = time.monotonic()
+        if now - window_state["start"] >= window:
+            window_state["start"] = now
+            window_state["count"] = 0
+        window_state["count"] += 1
+        reset_in = window - (now - window_state["start"])
+        headers = {"x-ratelimit-reset-requests": f"{max(reset_in, 0.001):.3f}s"}
+        if requests_per_window is not None:
+            remaining = max(0, requests_per_window - window_state["count"])
+            headers["x-ratelimit-limit-requests"] = str(requests_per_window)
+            headers["x-ratelimit-remaining-requests"] = str(remaining)
+            if window_state["count"] > requests_per_window:
+                app.state.rate_limited += 1
+                return JSONResponse(
+                    {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                    status_code=429,
+                    headers=headers,
+                )
+
+        await asyncio.sleep(latency)
+        app.state.requests += 1
+        app.state.inputs += len(inputs)
+        data = [
+            {"object": "embedding", "index": i, "embedding": _fake_vector(str(text), dimensions, encoding_format)}
+            for i, text in enumerate(inputs)
+        ]
+        return JSONResponse(
+            {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "fake"),
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            },
+            headers=headers,
+        )
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(app: FastAPI):
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        server.should_exit = True
+        thread.join()
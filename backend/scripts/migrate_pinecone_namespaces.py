@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.dependencies import get_pinecone_index
+from app.services.pinecone_store import _fetched_vectors
+from app.services.supabase_client import list_documents
+
+logger = logging.getLogger("migrate_pinecone_namespaces")
+
+PAGE_SIZE = 100
+
+
+def _timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+async def list_document_ids(index, document_id: str, namespace: str) -> list[str]:
+    ids: list[str] = []
+    pagination_token = None
+    while True:
+        page = await asyncio.to_thread(
+            index.list_paginated,
+            prefix=f"{document_id}#",
+            limit=PAGE_SIZE,
+            pagination_token=pagination_token,
+            namespace=namespace,
+        )
+        ids.extend(item.id for item in page.vectors or [])
+        pagination_token = page.pagination.next if page.pagination is not None else None
+        if not pagination_token:
+            return ids
+
+
+def _upsert_payload(fetched: dict[str, dict]) -> list[dict]:
+    return [
+        {
+            "id": vid,
+            "values": vector["values"].tolist(),
+            "metadata": {k: v for k, v in vector.items() if k not in ("id", "values")},
+        }
+        for vid, vector in fetched.items()
+    ]
+
+
+def _same_vector(a: dict, b: dict) -> bool:
+    if not np.array_equal(a["values"], b["values"]):
+        return False
+    return {k: v for k, v in a.items() if k != "values"} == {k: v for k, v in b.items() if k != "values"}
+
+
+async def copy_document(index, document_id: str, source_namespace: str, dry_run: bool) -> int:
+    ids = await list_document_ids(index, document_id, source_namespace)
+    if dry_run:
+        return len(ids)
+    for i in range(0, len(ids), PAGE_SIZE):
+        page = ids[i : i + PAGE_SIZE]
+        fetched = _fetched_vectors(await asyncio.to_thread(index.fetch, ids=page, namespace=source_namespace))
+        if fetched:
+            await asyncio.to_thread(index.upsert, vectors=_upsert_payload(fetched), namespace=document_id)
+    return len(ids)
+
+
+async def delete_source(index, document_id: str, source_namespace: str, dry_run: bool, resync: bool = True) -> int:
+    ids = await list_document_ids(index, document_id, source_namespace)
+    if resync:
+        stale = sorted(set(await list_document_ids(index, document_id, document_id)) - set(ids))
+        if stale:
+            logger.info(f"{document_id}: removing {len(stale)} vectors no longer in the source")
+            if not dry_run:
+                for i in range(0, len(stale), PAGE_SIZE):
+                    await asyncio.to_thread(index.delete, ids=stale[i : i + PAGE_SIZE], namespace=document_id)
+
+    for i in range(0, len(ids), PAGE_SIZE):
+        page = ids[i : i + PAGE_SIZE]
+        if resync:
+            source = _fetched_vectors(await asyncio.to_thread(index.fetch, ids=page, namespace=source_namespace))
+            copied = _fetched_vectors(await asyncio.to_thread(index.fetch, ids=page, namespace=document_id))
+            changed = {
+                vid: vector
+                for vid, vector in source.items()
+                if vid not in copied or not _same_vector(vector, copied[vid])
+            }
+            if changed:
+                logger.info(f"{document_id}: copying {len(changed)} missing or changed vectors again")
+                if not dry_run:
+                    await asyncio.to_thread(index.upsert, vectors=_upsert_payload(changed), namespace=document_id)
+        if not dry_run:
+            await asyncio.to_thread(index.delete, ids=page, namespace=source_namespace)
+    return len(ids)
+
+
+async def migrate(
+    document_ids: list[str],
+    source_namespace: str,
+    concurrency: int,
+    remove_source: bool,
+    dry_run: bool,
+    written_after_flip: frozenset[str] = frozenset(),
+) -> dict[str, int]:
+    index = get_pinecone_index()
+    semaphore = asyncio.Semaphore(concurrency)
+    verb = "deleted from source" if remove_source else "copied"
+    counts: dict[str, int] = {}
+
+    async def run_one(document_id: str) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            if remove_source:
+                resync = document_id not in written_after_flip
+                counts[document_id] = await delete_source(index, document_id, source_namespace, dry_run, resync)
+            else:
+                counts[document_id] = await copy_document(index, document_id, source_namespace, dry_run)
+            logger.info(
+                f"{document_id}: {counts[document_id]} vectors "
+                f"{'found' if dry_run else verb} in {time.perf_counter() - started:.1f}s"
+            )
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            for document_id in document_ids:
+                group.create_task(run_one(document_id))
+    except BaseExceptionGroup as eg:
+        raise eg.exceptions[0]
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Copy vectors from the shared Pinecone namespace into one namespace per document"
+    )
+    parser.add_argument("--document-id", action="append", help="migrate only these documents (repeatable)")
+    parser.add_argument("--source-namespace", default="")
+    parser.add_argument("--concurrency", type=int, default=4, help="documents migrated at once")
+    parser.add_argument(
+        "--delete-source",
+        action="store_true",
+        help="copy missing or changed vectors again, then remove the shared copies; run after the flag is flipped",
+    )
+    parser.add_argument(
+        "--flipped-at",
+        type=_timestamp,
+        help="when PINECONE_NAMESPACE_PER_DOCUMENT was flipped; documents written later keep their new vectors",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="count vectors without writing")
+    args = parser.parse_args()
+    if args.delete_source and args.flipped_at is None:
+        parser.error("--delete-source requires --flipped-at")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    documents = asyncio.run(list_documents(columns="id, updated_at"))
+    document_ids = args.document_id or [d["id"] for d in documents]
+    written_after_flip = frozenset(
+        d["id"]
+        for d in documents
+        if args.flipped_at is not None and _timestamp(d["updated_at"]) > args.flipped_at
+    )
+    counts = asyncio.run(
+        migrate(
+            document_ids,
+            args.source_namespace,
+            max(1, args.concurrency),
+            args.delete_source,
+            args.dry_run,
+            written_after_flip,
+        )
+    )
+    print(f"{sum(counts.values())} vectors across {len(counts)} documents")
+    if not args.dry_run and not args.delete_source:
+        print(
+            "Next: set PINECONE_NAMESPACE_PER_DOCUMENT=true on every replica and note the time, then run "
+            "--delete-source --flipped-at <that time>. It copies vectors changed or added since this run "
+            "again before removing the shared copies."
+        )
+
+
+if __name__ == "__main__":
+    main()
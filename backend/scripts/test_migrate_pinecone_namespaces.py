@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from scripts.migrate_pinecone_namespaces import PAGE_SIZE, copy_document, delete_source
+
+
+class _FakeIndex:
+    def __init__(self, vectors: dict[str, dict[str, dict]]):
+        self.vectors = vectors
+        self._lock = threading.Lock()
+
+    def list_paginated(self, prefix, limit, pagination_token, namespace):
+        ids = sorted(v for v in self.vectors.get(namespace, {}) if v.startswith(prefix))
+        start = int(pagination_token or 0)
+        page = ids[start : start + limit]
+        following = start + limit
+        return SimpleNamespace(
+            vectors=[SimpleNamespace(id=v) for v in page],
+            pagination=SimpleNamespace(next=str(following)) if following < len(ids) else None,
+        )
+
+    def fetch(self, ids, namespace):
+        stored = self.vectors.get(namespace, {})
+        return SimpleNamespace(
+            vectors={
+                v: SimpleNamespace(values=stored[v]["values"], metadata=stored[v]["metadata"])
+                for v in ids
+                if v in stored
+            }
+        )
+
+    def upsert(self, vectors, namespace):
+        with self._lock:
+            target = self.vectors.setdefault(namespace, {})
+            for v in vectors:
+                target[v["id"]] = {"values": v["values"], "metadata": v["metadata"]}
+
+    def delete(self, ids, namespace):
+        with self._lock:
+            for v in ids:
+                self.vectors[namespace].pop(v, None)
+
+
+def _shared(count: int) -> dict[str, dict]:
+    vectors = {f"doc#{i}": {"values": [float(i), 0.0], "metadata": {"chunk_index": i}} for i in range(count)}
+    vectors["other#0"] = {"values": [1.0, 1.0], "metadata": {"chunk_index": 0}}
+    return vectors
+
+
+@pytest.mark.asyncio
+class TestCopyDocument:
+    async def test_copies_every_page_and_keeps_source(self):
+        count = PAGE_SIZE * 2 + 5
+        index = _FakeIndex({"": _shared(count)})
+
+        copied = await copy_document(index, "doc", "", dry_run=False)
+
+        assert copied == count
+        assert len(index.vectors["doc"]) == count
+        assert index.vectors["doc"]["doc#7"] == {"values": [7.0, 0.0], "metadata": {"chunk_index": 7}}
+        assert len(index.vectors[""]) == count + 1
+
+    async def test_dry_run_writes_nothing(self):
+        index = _FakeIndex({"": _shared(3)})
+
+        assert await copy_document(index, "doc", "", dry_run=True) == 3
+        assert list(index.vectors) == [""]
+        assert len(index.vectors[""]) == 4
+
+
+@pytest.mark.asyncio
+class TestDeleteSource:
+    async def test_deletes_copied_vectors_from_source(self):
+        count = PAGE_SIZE + 5
+        index = _FakeIndex({"": _shared(count)})
+        await copy_document(index, "doc", "", dry_run=False)
+
+        assert await delete_source(index, "doc", "", dry_run=False) == count
+        assert list(index.vectors[""]) == ["other#0"]
+        assert len(index.vectors["doc"]) == count
+
+    async def test_copies_vectors_missing_from_document_namespace_before_deleting(self):
+        index = _FakeIndex({"": _shared(3)})
+        index.upsert([{"id": "doc#0", "values": [0.0, 0.0], "metadata": {"chunk_index": 0}}], namespace="doc")
+
+        assert await delete_source(index, "doc", "", dry_run=False) == 3
+        assert sorted(index.vectors["doc"]) == ["doc#0", "doc#1", "doc#2"]
+        assert list(index.vectors[""]) == ["other#0"]
+
+    async def test_recopies_vectors_changed_since_the_copy(self):
+        index = _FakeIndex({"": _shared(3)})
+        await copy_document(index, "doc", "", dry_run=False)
+        index.upsert([{"id": "doc#1", "values": [9.0, 9.0], "metadata": {"chunk_index": 1}}], namespace="")
+        index.delete(["doc#2"], namespace="")
+
+        await delete_source(index, "doc", "", dry_run=False)
+
+        assert index.vectors["doc"]["doc#1"]["values"] == [9.0, 9.0]
+        assert sorted(index.vectors["doc"]) == ["doc#0", "doc#1"]
+
+    async def test_documents_written_after_flip_keep_their_vectors(self):
+        index = _FakeIndex({"": _shared(2)})
+        index.upsert([{"id": "doc#0", "values": [5.0, 5.0], "metadata": {"chunk_index": 0}}], namespace="doc")
+
+        assert await delete_source(index, "doc", "", dry_run=False, resync=False) == 2
+        assert index.vectors["doc"] == {"doc#0": {"values": [5.0, 5.0], "metadata": {"chunk_index": 0}}}
+        assert list(index.vectors[""]) == ["other#0"]
+
+    async def test_dry_run_deletes_nothing(self):
+        index = _FakeIndex({"": _shared(3)})
+        await copy_document(index, "doc", "", dry_run=False)
+
+        assert await delete_source(index, "doc", "", dry_run=True) == 3
+        assert len(index.vectors[""]) == 4
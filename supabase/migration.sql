@@ -6,10 +6,15 @@ create table if not exists documents (
     status text not null default 'pending' check (status in ('pending', 'processing', 'ready', 'failed')),
     page_count integer,
     sections jsonb,
+    index_version text,
     created_at timestamptz not null default now(),
     updated_at timestamptz not null default now()
 );
 
+alter table documents add column if not exists index_version text;
+
+create index if not exists idx_documents_created_at on documents(created_at desc);
+
 -- Document sections table
 create table if not exists document_sections (
     id uuid primary key default gen_random_uuid(),
@@ -23,16 +28,50 @@ create table if not exists document_sections (
 );
 
 create index if not exists idx_document_sections_document_id on document_sections(document_id);
+create index if not exists idx_document_sections_parent_section_id on document_sections(parent_section_id);
+
+-- Document chunks table
+create table if not exists document_chunks (
+    id text primary key,
+    document_id uuid not null references documents(id) on delete cascade,
+    chunk_index integer not null,
+    chunk_text text not null,
+    content_hash text,
+    created_at timestamptz not null default now()
+);
+
+alter table document_chunks add column if not exists content_hash text;
+
+drop index if exists idx_document_chunks_document_id;
+create index if not exists idx_document_chunks_document_id_chunk_index on document_chunks(document_id, chunk_index);
 
 -- Threads table
 create table if not exists threads (
     id uuid primary key default gen_random_uuid(),
     title text,
-    document_id uuid references documents(id) on delete set null,
+    document_id uuid references documents(id) on delete cascade,
     created_at timestamptz not null default now(),
     updated_at timestamptz not null default now()
 );
 
+do $$
+begin
+    if not exists (
+        select 1 from pg_constraint
+        where conrelid = 'threads'::regclass
+            and conname = 'threads_document_id_fkey'
+            and confdeltype = 'c'
+    ) then
+        alter table threads drop constraint if exists threads_document_id_fkey;
+        alter table threads add constraint threads_document_id_fkey
+            foreign key (document_id) references documents(id) on delete cascade;
+    end if;
+end;
+$$;
+
+create index if not exists idx_threads_created_at on threads(created_at desc);
+create index if not exists idx_threads_document_id on threads(document_id);
+
 -- Messages table
 create table if not exists messages (
     id uuid primary key default gen_random_uuid(),
@@ -45,7 +84,8 @@ create table if not exists messages (
     created_at timestamptz not null default now()
 );
 
-create index if not exists idx_messages_thread_id on messages(thread_id);
+drop index if exists idx_messages_thread_id;
+create index if not exists idx_messages_thread_id_created_at on messages(thread_id, created_at);
 
 -- Updated_at trigger function
 create or replace function update_updated_at()
@@ -75,3 +115,41 @@ create table if not exists message_feedback (
 create or replace trigger message_feedback_updated_at
     before update on message_feedback
     for each row execute function update_updated_at();
+
+-- Messages joined with their feedback, paged by (thread_id, created_at)
+create or replace view thread_messages with (security_invoker = true) as
+select
+    m.id,
+    m.thread_id,
+    m.role,
+    m.content,
+    m.citations,
+    m.clarification_chips,
+    m.message_type,
+    f.signal as feedback,
+    m.created_at
+from messages m
+left join message_feedback f on f.message_id = m.id;
+
+-- Factory reset: returns the deleted document ids so vectors and storage can be cleared in bulk
+create or replace function factory_reset()
+returns uuid[]
+language plpgsql
+as $$
+declare
+    document_ids uuid[];
+begin
+    select coalesce(array_agg(id), '{}') into document_ids from documents;
+    truncate message_feedback, messages, threads, document_chunks, document_sections, documents;
+    return document_ids;
+end;
+$$;
+
+revoke execute on function factory_reset() from public;
+do $$
+begin
+    if exists (select 1 from pg_roles where rolname = 'anon') then
+        revoke execute on function factory_reset() from anon, authenticated;
+    end if;
+end;
+$$;